@@ -6,7 +6,9 @@ bind = "0.0.0.0:" + os.environ.get("PORT", "8000")
 
 # Worker processes - ONLY 1 WORKER FOR RENDER FREE TIER
 workers = 1  # Critical: Render free tier has limited memory
-worker_class = "sync"
+# Threads let I/O-bound requests (code execution, AI, email) overlap without extra processes
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
 worker_connections = 1000
 timeout = 120  # Increased timeout to prevent worker killing
 keepalive = 5
@@ -98,6 +98,7 @@ class NoteVersionAdmin(admin.ModelAdmin):
 @admin.register(AIGeneratedContent)
 class AIGeneratedContentAdmin(admin.ModelAdmin):
     list_display = ('user', 'action_type', 'topic', 'created_at')
+    list_select_related = ('user', 'topic__chapter')
     list_filter = ('action_type', 'created_at')
     search_fields = ('user__username', 'input_content')
     readonly_fields = ('created_at',)
@@ -116,6 +117,7 @@ class NoteShareAdmin(admin.ModelAdmin):
 @admin.register(AIHistory)
 class AIHistoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'feature_type', 'title', 'created_at')
+    list_select_related = ('user',)
     list_filter = ('feature_type', 'created_at')
     search_fields = ('user__email', 'title')
     readonly_fields = ('created_at',)
\ No newline at end of file
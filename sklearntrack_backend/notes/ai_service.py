@@ -4,11 +4,61 @@
 from django.conf import settings
 import logging
 import re
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Iterator, Tuple
 import markdown
 
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used on every AI request
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+_CODE_FENCE_RE = re.compile(r'^```[\w]*\n|```$', re.MULTILINE)
+
+# Tailwind styling applied to rendered markdown
+_HTML_STYLE_RULES = [
+    (re.compile(r'<h1>(.*?)</h1>'), r'<h1 class="text-3xl font-bold mt-6 mb-3 text-blue-900">\1</h1>'),
+    (re.compile(r'<h2>(.*?)</h2>'), r'<h2 class="text-2xl font-bold mt-5 mb-2 text-blue-800">\1</h2>'),
+    (re.compile(r'<h3>(.*?)</h3>'), r'<h3 class="text-xl font-semibold mt-4 mb-2 text-blue-700">\1</h3>'),
+    (re.compile(r'<p>(.*?)</p>'), r'<p class="mb-3 leading-relaxed text-gray-800">\1</p>'),
+    (re.compile(r'<ul>'), r'<ul class="list-disc pl-6 mb-3 space-y-1">'),
+    (re.compile(r'<ol>'), r'<ol class="list-decimal pl-6 mb-3 space-y-1">'),
+    (re.compile(r'<code>(.*?)</code>'), r'<code class="bg-gray-100 text-red-600 px-1.5 py-0.5 rounded font-mono text-sm">\1</code>'),
+    (re.compile(r'<pre>'), r'<pre class="bg-gray-900 text-gray-100 p-4 rounded-lg overflow-x-auto mb-4">'),
+]
+
+# Fallback code templates when AI is unavailable
+_CODE_TEMPLATES = {
+    'python': '''# {topic}
+"""
+{error_msg}
+"""
+
+def example():
+    """Example for {topic}"""
+    pass
+''',
+    'javascript': '''// {topic}
+// {error_msg}
+
+function example() {{
+  // Your code here
+}}
+''',
+}
+
+
+def _html_to_text(html: str) -> str:
+    """Strip tags and collapse whitespace"""
+    return _WHITESPACE_RE.sub(' ', _HTML_TAG_RE.sub(' ', html)).strip()
+
+
+@lru_cache(maxsize=4)
+def _build_groq_client(api_key: str):
+    """Build one Groq client (and HTTP connection pool) per API key per process"""
+    from groq import Groq
+    return Groq(api_key=api_key)
+
 
 class AIService:
     """
@@ -21,14 +71,13 @@ class AIService:
         self.temperature = 0.7
     
     def _get_groq_client(self):
-        """Initialize Groq client"""
+        """Get the shared Groq client"""
         try:
-            from groq import Groq
             api_key = getattr(settings, 'GROQ_API_KEY', None)
             if not api_key:
                 logger.warning("GROQ_API_KEY not configured")
                 return None
-            return Groq(api_key=api_key)
+            return _build_groq_client(api_key)
         except ImportError:
             logger.error("groq package not installed. Run: pip install groq")
             return None
@@ -431,46 +480,85 @@ Provide complete expert-level coverage."""
         level: str = "beginner"
     ) -> str:
         """Generate explanation with STRICT structure enforcement"""
+        return self.generate_explanation_with_markdown(topic_name, subject_area, level)[0]
+    
+    def generate_explanation_with_markdown(
+        self,
+        topic_name: str,
+        subject_area: str = "programming",
+        level: str = "beginner"
+    ) -> Tuple[str, str]:
+        """Generate explanation as (html, markdown); markdown is empty on failure"""
         if not self.client:
-            return self._get_config_message(topic_name)
+            return self._get_config_message(topic_name), ''
         
         try:
-            prompts = self._get_level_specific_prompt(level, topic_name, subject_area)
-            
-            # Token limits per level
-            level_tokens = {
-                'beginner': 1500,      # Enough for all sections
-                'intermediate': 2000,   # More detailed
-                'advanced': 2800,       # Deep technical
-                'expert': 4000          # Most comprehensive
-            }
-            max_tokens = level_tokens.get(level.lower(), 1500)
-            
             response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": prompts['system']},
-                    {"role": "user", "content": prompts['user']}
-                ],
-                temperature=self.temperature,
-                max_tokens=max_tokens,
+                **self._explanation_request(topic_name, subject_area, level),
                 stream=False
             )
             
             markdown_content = response.choices[0].message.content
-            return self._markdown_to_html(markdown_content)
+            return self._markdown_to_html(markdown_content), markdown_content
             
         except Exception as e:
             logger.error(f"AI generation error: {e}", exc_info=True)
-            return self._get_error_message(topic_name, str(e))
+            return self._get_error_message(topic_name, str(e)), ''
     
-    def improve_explanation(self, current_explanation: str, level: str = None) -> str:
-        """Improve existing explanation"""
+    def stream_explanation(
+        self,
+        topic_name: str,
+        subject_area: str = "programming",
+        level: str = "beginner"
+    ) -> Iterator[str]:
+        """Yield explanation markdown chunks as Groq produces them; returns True on success"""
+        if not self.client:
+            yield "## ⚙️ AI Configuration Required\n\nConfigure GROQ_API_KEY in settings to enable AI features."
+            return False
+        
+        try:
+            stream = self.client.chat.completions.create(
+                **self._explanation_request(topic_name, subject_area, level),
+                stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception as e:
+            logger.error(f"AI streaming error: {e}", exc_info=True)
+            yield f"\n\n**❌ AI Error:** {e}"
+            return False
+        return True
+    
+    def _explanation_request(self, topic_name: str, subject_area: str, level: str) -> Dict:
+        """Build chat completion arguments for an explanation"""
+        prompts = self._get_level_specific_prompt(level, topic_name, subject_area)
+        
+        # Token limits per level
+        level_tokens = {
+            'beginner': 1500,      # Enough for all sections
+            'intermediate': 2000,   # More detailed
+            'advanced': 2800,       # Deep technical
+            'expert': 4000          # Most comprehensive
+        }
+        
+        return {
+            'model': "llama-3.3-70b-versatile",
+            'messages': [
+                {"role": "system", "content": prompts['system']},
+                {"role": "user", "content": prompts['user']}
+            ],
+            'temperature': self.temperature,
+            'max_tokens': level_tokens.get(level.lower(), 1500),
+        }
+    
+    def improve_explanation(self, current_explanation: str, level: str = None, is_markdown: bool = False) -> str:
+        """Improve existing explanation (HTML, or markdown when is_markdown)"""
         if not self.client:
             return f"{current_explanation}\n\n---\n💡 Configure GROQ_API_KEY for AI features."
         
-        text_content = re.sub(r'<[^>]+>', ' ', current_explanation)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
+        text_content = current_explanation.strip() if is_markdown else _html_to_text(current_explanation)
         
         if len(text_content) < 20:
             raise Exception("Content too short to improve")
@@ -506,13 +594,12 @@ Maintain the SAME complexity level and structure."""
             logger.error(f"Improvement error: {e}")
             raise
     
-    def summarize_explanation(self, explanation: str) -> str:
-        """Summarize to key points"""
+    def summarize_explanation(self, explanation: str, is_markdown: bool = False) -> str:
+        """Summarize to key points (HTML, or markdown when is_markdown)"""
         if not self.client:
             return "## Summary\n\nConfigure GROQ_API_KEY to enable summarization"
         
-        text_content = re.sub(r'<[^>]+>', ' ', explanation)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
+        text_content = explanation.strip() if is_markdown else _html_to_text(explanation)
         
         try:
             response = self.client.chat.completions.create(
@@ -592,7 +679,7 @@ Provide ONLY code with comments. No markdown formatting."""
             )
             
             code = response.choices[0].message.content
-            code = re.sub(r'^```[\w]*\n|```$', '', code, flags=re.MULTILINE).strip()
+            code = _CODE_FENCE_RE.sub('', code).strip()
             return code
         except Exception as e:
             logger.error(f"Code generation error: {e}")
@@ -608,14 +695,8 @@ Provide ONLY code with comments. No markdown formatting."""
             html = markdown.markdown(text, extensions=extensions)
             
             # Add styling classes
-            html = re.sub(r'<h1>(.*?)</h1>', r'<h1 class="text-3xl font-bold mt-6 mb-3 text-blue-900">\1</h1>', html)
-            html = re.sub(r'<h2>(.*?)</h2>', r'<h2 class="text-2xl font-bold mt-5 mb-2 text-blue-800">\1</h2>', html)
-            html = re.sub(r'<h3>(.*?)</h3>', r'<h3 class="text-xl font-semibold mt-4 mb-2 text-blue-700">\1</h3>', html)
-            html = re.sub(r'<p>(.*?)</p>', r'<p class="mb-3 leading-relaxed text-gray-800">\1</p>', html)
-            html = re.sub(r'<ul>', r'<ul class="list-disc pl-6 mb-3 space-y-1">', html)
-            html = re.sub(r'<ol>', r'<ol class="list-decimal pl-6 mb-3 space-y-1">', html)
-            html = re.sub(r'<code>(.*?)</code>', r'<code class="bg-gray-100 text-red-600 px-1.5 py-0.5 rounded font-mono text-sm">\1</code>', html)
-            html = re.sub(r'<pre>', r'<pre class="bg-gray-900 text-gray-100 p-4 rounded-lg overflow-x-auto mb-4">', html)
+            for pattern, replacement in _HTML_STYLE_RULES:
+                html = pattern.sub(replacement, html)
             
             return html
         except Exception as e:
@@ -641,26 +722,8 @@ Provide ONLY code with comments. No markdown formatting."""
     def _get_code_template(self, topic: str, language: str, error: str = None) -> str:
         """Code template when AI unavailable"""
         error_msg = f'Error: {error}' if error else 'Configure GROQ_API_KEY'
-        
-        templates = {
-            'python': f'''# {topic}
-"""
-{error_msg}
-"""
-
-def example():
-    """Example for {topic}"""
-    pass
-''',
-            'javascript': f'''// {topic}
-// {error_msg}
-
-function example() {{
-  // Your code here
-}}
-''',
-        }
-        return templates.get(language, templates['python'])
+        template = _CODE_TEMPLATES.get(language, _CODE_TEMPLATES['python'])
+        return template.format(topic=topic, error_msg=error_msg)
 
 
 # Singleton instance
@@ -680,14 +743,19 @@ def generate_ai_explanation(topic_name: str, subject_area: str = "programming",
     return get_ai_service().generate_explanation(topic_name, subject_area, level)
 
 
-def improve_explanation(current_explanation: str, level: str = None) -> str:
+def stream_ai_explanation(topic_name: str, subject_area: str = "programming", level: str = "beginner") -> Iterator[str]:
+    """Stream explanation markdown chunks"""
+    return get_ai_service().stream_explanation(topic_name, subject_area, level)
+
+
+def improve_explanation(current_explanation: str, level: str = None, is_markdown: bool = False) -> str:
     """Improve explanation"""
-    return get_ai_service().improve_explanation(current_explanation, level)
+    return get_ai_service().improve_explanation(current_explanation, level, is_markdown)
 
 
-def summarize_explanation(explanation: str) -> str:
+def summarize_explanation(explanation: str, is_markdown: bool = False) -> str:
     """Summarize explanation"""
-    return get_ai_service().summarize_explanation(explanation)
+    return get_ai_service().summarize_explanation(explanation, is_markdown)
 
 
 def generate_ai_code(topic_name: str, language: str = 'python', level: str = 'beginner') -> str:
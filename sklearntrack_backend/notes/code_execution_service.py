@@ -2,8 +2,12 @@
 # Advanced, fast, stdin-enabled code runner using Piston API
 
 import time
+import hashlib
 import requests
-from typing import Dict, Any
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 import json
 
 PISTON_URL = "https://emkc.org/api/v2/piston/execute"
@@ -22,6 +26,16 @@ LANGUAGE_MAP = {
     "sql": {"lang": "sqlite3", "version": "3.36.0", "ext": "sql"},
 }
 
+COMPILE_ERROR_CACHE_TTL = 600  # seconds
+
+# Piston applies run_memory_limit as an address-space cap; the JVM, V8 and Go
+# runtimes reserve far more virtual memory than that at startup, so they run uncapped
+UNCAPPED_MEMORY_LANGUAGES = {"java", "javascript", "typescript", "go"}
+
+# One keep-alive session per process: runs reuse the TCP/TLS connection to Piston
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
 class CodeExecutionService:
     @staticmethod
     def execute_code(code: str, language: str = "python", stdin: str = "",
@@ -31,7 +45,27 @@ class CodeExecutionService:
             return {"success": False, "output": "", "error": f"Unsupported language: {language}",
                     "exit_code": None, "runtime_ms": 0}
 
+        # Python that reads input() without stdin is reported as needing input whatever
+        # it prints, so don't ship it to the executor at all
+        if language == "python" and not stdin and "input(" in code.lower():
+            return {
+                "success": False, 
+                "output": "", 
+                "error": "This code requires input. Please provide input in the stdin field.",
+                "exit_code": None,
+                "runtime_ms": 0,
+                "requires_input": True
+            }
+
         cfg = LANGUAGE_MAP[language]
+
+        # Compile failures depend only on the source, so re-runs of the same broken code are served from cache
+        source_hash = hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+        compile_cache_key = f"code_exec:compile_error:{cfg['lang']}:{cfg['version']}:{source_hash}"
+        cached_compile_error = cache.get(compile_cache_key)
+        if cached_compile_error:
+            return dict(cached_compile_error, runtime_ms=0)
+
         payload = {
             "language": cfg["lang"],
             "version": cfg["version"],
@@ -40,11 +74,13 @@ class CodeExecutionService:
             "run_timeout": timeout * 1000,  # Piston expects milliseconds
             "compile_timeout": timeout * 1000,
         }
+        if language not in UNCAPPED_MEMORY_LANGUAGES:
+            payload["run_memory_limit"] = memory_limit * 1024 * 1024  # Enforced by the sandbox, in bytes
 
         start = time.perf_counter()
         try:
             # Add headers and increase timeout
-            r = requests.post(
+            r = _session.post(
                 PISTON_URL, 
                 json=payload, 
                 timeout=(timeout + 10),
@@ -74,10 +110,13 @@ class CodeExecutionService:
             # Check compilation errors
             if compile_res and compile_res.get("code", 0) != 0:
                 error_output = compile_res.get("stderr", "") or compile_res.get("stdout", "")
-                return {"success": False, "output": compile_res.get("stdout", ""),
-                        "error": error_output,
-                        "exit_code": compile_res.get("code"),
-                        "runtime_ms": runtime_ms}
+                result = {"success": False, "output": compile_res.get("stdout", ""),
+                          "error": error_output,
+                          "exit_code": compile_res.get("code"),
+                          "runtime_ms": runtime_ms}
+                if compile_res.get("signal") is None:  # Not killed by a compile timeout
+                    cache.set(compile_cache_key, result, COMPILE_ERROR_CACHE_TTL)
+                return result
 
             # Check runtime errors
             exit_code = run.get("code", 1)
@@ -90,21 +129,6 @@ class CodeExecutionService:
                 if "error" in output.lower() or "exception" in output.lower() or "traceback" in output.lower():
                     error = output
                     output = ""
-            
-            # Special handling for Python input()
-            if language == "python" and "input" in code.lower() and not stdin:
-                # Check if code expects input
-                lines = code.split('\n')
-                has_input = any('input(' in line.lower() for line in lines)
-                if has_input:
-                    return {
-                        "success": False, 
-                        "output": "", 
-                        "error": "This code requires input. Please provide input in the stdin field.",
-                        "exit_code": None,
-                        "runtime_ms": runtime_ms,
-                        "requires_input": True
-                    }
 
             return {
                 "success": exit_code == 0,
@@ -126,4 +150,12 @@ class CodeExecutionService:
                 return {"success": False, "output": "", "error": "Service unavailable. Please try again later.",
                         "exit_code": None, "runtime_ms": 0}
             return {"success": False, "output": "", "error": f"Execution failed: {error_msg}",
-                    "exit_code": None, "runtime_ms": 0}
\ No newline at end of file
+                    "exit_code": None, "runtime_ms": 0}
+
+    @staticmethod
+    def execute_batch(jobs: List[Dict[str, Any]], max_workers: int = 4) -> List[Dict[str, Any]]:
+        """Run several execute_code jobs concurrently; results keep the jobs' order"""
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            return list(executor.map(lambda job: CodeExecutionService.execute_code(**job), jobs))
@@ -2,7 +2,14 @@
 # ============================================================================
 
 from django.utils import timezone
+from datetime import datetime, time, timedelta
 from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.db.models import Count, Q
+from functools import lru_cache
+import hashlib
+import json
 import logging
 from .models import Note, ChapterTopic
 
@@ -15,31 +22,48 @@ except ImportError:
     logger.warning("EmailService not found, will use fallback method")
     EmailService = None
 
+EMAIL_CONTENT_CACHE_TTL = 3600  # seconds
+
+
+def _day_bounds(day):
+    """Half-open [start, end) datetimes for a local date; keeps timestamp indexes usable, unlike __date casts"""
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    return day_start, day_start + timedelta(days=1)
+
+
+@lru_cache(maxsize=1)
+def _email_templates():
+    """Compiled HTML and text templates for the report email, resolved once per process"""
+    return (
+        get_template('notes/emails/daily_report.html'),
+        get_template('notes/emails/daily_report.txt'),
+    )
+
 
 class DailyNotesReportService:
     """Service for generating and sending daily learning reports"""
     
     @staticmethod
-    def generate_daily_report(user):
-        """Generate daily report data for a user"""
-        today = timezone.now().date()
-        
-        # Notes created today
-        notes_created = Note.objects.filter(
-            user=user,
-            created_at__date=today
-        ).count()
+    def generate_daily_report(user, today=None):
+        """Generate daily report data for a user (today defaults to the current local date)"""
+        today = today or timezone.localdate()
+        day_start, day_end = _day_bounds(today)
         
-        # Notes updated today (excluding newly created ones)
-        notes_updated = Note.objects.filter(
-            user=user,
-            updated_at__date=today
-        ).exclude(created_at__date=today).count()
+        # Notes created today and notes updated today (excluding newly created ones), in one query
+        created_today = Q(created_at__gte=day_start, created_at__lt=day_end)
+        updated_today = Q(updated_at__gte=day_start, updated_at__lt=day_end)
+        note_counts = Note.objects.filter(created_today | updated_today, user=user).aggregate(
+            notes_created=Count('id', filter=created_today),
+            notes_updated=Count('id', filter=updated_today & ~created_today),
+        )
+        notes_created = note_counts['notes_created']
+        notes_updated = note_counts['notes_updated']
         
         # Topics created today
         topics_created = ChapterTopic.objects.filter(
             chapter__note__user=user,
-            created_at__date=today
+            created_at__gte=day_start,
+            created_at__lt=day_end
         ).count()
         
         # Estimate study time (5 minutes per topic)
@@ -47,9 +71,9 @@ class DailyNotesReportService:
         
         # Get notes list worked on today
         notes_list = Note.objects.filter(
-            user=user,
-            updated_at__date=today
-        ).distinct()
+            updated_today,
+            user=user
+        ).only('title', 'status').annotate(chapter_count=Count('chapters'))
         
         return {
             'date': today.strftime('%B %d, %Y'),
@@ -66,144 +90,64 @@ class DailyNotesReportService:
         Create HTML and text content for the email
         Optimized to avoid spam filters
         """
+        # Retries and fallback sends of the same report reuse the rendered bodies
+        cache_key = DailyNotesReportService._email_cache_key(user, report_data)
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
         
-        # Create notes list text
-        notes_list_text = ""
-        if report_data['notes_list']:
-            notes_list_text = "\n\nYou worked on these notes today:\n"
-            for note in report_data['notes_list']:
-                notes_list_text += f"- {note.title} ({note.chapters.count()} chapters, {note.status})\n"
-        
-        # HTML content - clean and professional
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="margin: 0; padding: 0; font-family: Arial, sans-serif; background-color: #f4f4f4;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff;">
-                <!-- Header -->
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center;">
-                    <h1 style="color: #ffffff; margin: 0; font-size: 24px;">SK LearnTrack</h1>
-                    <p style="color: #ffffff; margin: 10px 0 0 0; opacity: 0.9;">Daily Learning Activity Report</p>
-                    <p style="color: #ffffff; margin: 5px 0 0 0; font-size: 14px; opacity: 0.8;">{report_data['date']}</p>
-                </div>
-                
-                <!-- Greeting -->
-                <div style="padding: 30px;">
-                    <p style="margin: 0 0 20px; font-size: 16px; color: #333333;">
-                        Hello <strong>{user.first_name or user.username}</strong>,
-                    </p>
-                    <p style="margin: 0 0 30px; font-size: 14px; color: #666666; line-height: 1.6;">
-                        Here's a summary of your learning activity today. Keep up the great work!
-                    </p>
-                    
-                    <!-- Stats Grid -->
-                    <table width="100%" cellpadding="0" cellspacing="0" style="margin-bottom: 30px;">
-                        <tr>
-                            <td width="48%" style="padding: 20px; background-color: #f8f9fa; border-radius: 8px; text-align: center;">
-                                <div style="font-size: 32px; font-weight: bold; color: #667eea; margin-bottom: 5px;">
-                                    {report_data['notes_created']}
-                                </div>
-                                <div style="font-size: 12px; color: #666666; text-transform: uppercase; letter-spacing: 1px;">
-                                    Notes Created
-                                </div>
-                            </td>
-                            <td width="4%"></td>
-                            <td width="48%" style="padding: 20px; background-color: #f8f9fa; border-radius: 8px; text-align: center;">
-                                <div style="font-size: 32px; font-weight: bold; color: #10b981; margin-bottom: 5px;">
-                                    {report_data['notes_updated']}
-                                </div>
-                                <div style="font-size: 12px; color: #666666; text-transform: uppercase; letter-spacing: 1px;">
-                                    Notes Updated
-                                </div>
-                            </td>
-                        </tr>
-                        <tr><td colspan="3" height="10"></td></tr>
-                        <tr>
-                            <td width="48%" style="padding: 20px; background-color: #f8f9fa; border-radius: 8px; text-align: center;">
-                                <div style="font-size: 32px; font-weight: bold; color: #8b5cf6; margin-bottom: 5px;">
-                                    {report_data['topics_created']}
-                                </div>
-                                <div style="font-size: 12px; color: #666666; text-transform: uppercase; letter-spacing: 1px;">
-                                    Topics Added
-                                </div>
-                            </td>
-                            <td width="4%"></td>
-                            <td width="48%" style="padding: 20px; background-color: #f8f9fa; border-radius: 8px; text-align: center;">
-                                <div style="font-size: 32px; font-weight: bold; color: #f59e0b; margin-bottom: 5px;">
-                                    {report_data['study_time_estimate']}
-                                </div>
-                                <div style="font-size: 12px; color: #666666; text-transform: uppercase; letter-spacing: 1px;">
-                                    Study Minutes
-                                </div>
-                            </td>
-                        </tr>
-                    </table>
-                    
-                    <!-- Encouragement -->
-                    <div style="background-color: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin-bottom: 30px; border-radius: 4px;">
-                        <p style="margin: 0; font-size: 14px; color: #92400e;">
-                            💡 <strong>Keep Going!</strong> Consistency is the key to mastering new concepts.
-                        </p>
-                    </div>
-                </div>
-                
-                <!-- Footer -->
-                <div style="background-color: #f8f9fa; padding: 30px; text-align: center; border-top: 1px solid #e5e7eb;">
-                    <p style="margin: 0 0 10px; font-size: 12px; color: #666666;">
-                        This is an automated learning activity report from SK LearnTrack.
-                    </p>
-                    <p style="margin: 0; font-size: 11px; color: #999999;">
-                        <a href="https://sk-learntrack.vercel.app/settings" style="color: #667eea; text-decoration: none;">Email Preferences</a>
-                        | 
-                        <a href="https://sk-learntrack.vercel.app" style="color: #999999; text-decoration: none;">Visit Dashboard</a>
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
+        html_template, text_template = _email_templates()
+        context = {'user': user, **report_data}
+        html_content = html_template.render(context)
         # Plain text version (critical for deliverability)
-        text_content = f"""
-SK LearnTrack - Daily Learning Activity Report
-{report_data['date']}
-
-Hello {user.first_name or user.username},
-
-Here's a summary of your learning activity today:
-
-STATISTICS:
-• Notes Created: {report_data['notes_created']}
-• Notes Updated: {report_data['notes_updated']}
-• Topics Added: {report_data['topics_created']}
-• Study Time: {report_data['study_time_estimate']} minutes
-{notes_list_text}
-
-Keep up the great work! Consistency is the key to mastering new concepts.
-
----
-This is an automated learning activity report.
-
-Manage your preferences: https://sk-learntrack.vercel.app/settings
-Visit your dashboard: https://sk-learntrack.vercel.app
-
-SK LearnTrack Team
-        """.strip()
+        text_content = text_template.render(context).strip()
         
+        cache.set(cache_key, (html_content, text_content), EMAIL_CONTENT_CACHE_TTL)
         return html_content, text_content
     
     @staticmethod
-    def send_daily_report_email(user, report_data):
+    def _email_cache_key(user, report_data):
+        """Cache key covering everything the email templates render"""
+        fingerprint = {
+            'user': [user.id, user.first_name, user.username],
+            'report': {key: value for key, value in report_data.items() if key != 'notes_list'},
+            'notes': [
+                [note.title, note.chapter_count, note.status]
+                for note in report_data['notes_list']
+            ],
+        }
+        digest = hashlib.blake2b(
+            json.dumps(fingerprint, sort_keys=True).encode('utf-8'), digest_size=16
+        ).hexdigest()
+        return f"daily_report:email:{digest}"
+    
+    @staticmethod
+    def _template_data(user, report_data):
+        """JSON-safe report values for the SendGrid dynamic template"""
+        return {
+            'subject': f'📚 Your Daily Learning Report - {report_data["date"]}',
+            'name': user.first_name or user.username,
+            'date': report_data['date'],
+            'notes_created': report_data['notes_created'],
+            'notes_updated': report_data['notes_updated'],
+            'topics_created': report_data['topics_created'],
+            'study_time_estimate': report_data['study_time_estimate'],
+            'notes_list': [
+                {'title': note.title, 'status': note.status, 'chapter_count': note.chapter_count}
+                for note in report_data['notes_list']
+            ],
+        }
+    
+    @staticmethod
+    def send_daily_report_email(user, report_data, connection=None, async_send=True):
         """
         Send daily report via email using the unified EmailService
         
         Args:
             user: User object
             report_data: Report data dictionary
+            connection: Optional shared mail connection (batch sends)
+            async_send: False to send on this thread, so failures are reported (Celery retries)
             
         Returns:
             bool: True if email sent successfully
@@ -216,6 +160,16 @@ SK LearnTrack Team
             
             logger.info(f"📧 Sending daily report to: {user.email}")
             
+            # Dynamic template: only the report values travel, the HTML lives in SendGrid
+            template_id = getattr(settings, 'SENDGRID_DAILY_REPORT_TEMPLATE_ID', '')
+            if EmailService and template_id and connection is None and not settings.DEBUG:
+                template_data = DailyNotesReportService._template_data(user, report_data)
+                recipient = {'to_email': user.email, 'data': template_data}
+                if EmailService.send_template_batch(template_id, [recipient]):
+                    logger.info(f"✅ Daily report email sent to {user.email}")
+                    return True
+                logger.warning("⚠️  SendGrid template send failed, sending rendered email")
+            
             # Create email content
             html_content, text_content = DailyNotesReportService._create_email_content(
                 user, report_data
@@ -232,7 +186,9 @@ SK LearnTrack Team
                     subject=subject,
                     text_content=text_content,
                     html_content=html_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    async_send=async_send,
+                    connection=connection
                 )
                 
                 if success:
@@ -245,17 +201,90 @@ SK LearnTrack Team
                 # Fallback to direct Django mail
                 logger.warning("Using fallback email method")
                 return DailyNotesReportService._send_fallback(
-                    user, subject, text_content, html_content
+                    user, subject, text_content, html_content, connection
                 )
             
-        except Exception as e:
-            import traceback
-            logger.error(f"❌ Daily report email error: {str(e)}")
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Daily report email error for user %s", user.username)
             return False
     
     @staticmethod
-    def _send_fallback(user, subject, text_content, html_content):
+    def had_activity_on(user, day):
+        """Cheap EXISTS check for any note or topic activity on a day"""
+        day_start, day_end = _day_bounds(day)
+        # Creating a note also stamps updated_at, so this covers new and edited notes
+        return (
+            Note.objects.filter(user=user, updated_at__gte=day_start, updated_at__lt=day_end).exists()
+            or ChapterTopic.objects.filter(
+                chapter__note__user=user, created_at__gte=day_start, created_at__lt=day_end
+            ).exists()
+        )
+    
+    @staticmethod
+    def has_activity(report_data):
+        """Whether a report reaches DAILY_REPORT_MIN_ACTIVITY (notes + topics touched)"""
+        activity = (
+            report_data['notes_created']
+            + report_data['notes_updated']
+            + report_data['topics_created']
+        )
+        return activity >= getattr(settings, 'DAILY_REPORT_MIN_ACTIVITY', 1)
+    
+    @staticmethod
+    def send_daily_reports(users, today=None):
+        """
+        Send daily reports to active users over one mail connection
+        
+        Returns:
+            int: Number of reports sent
+        """
+        from django.core.mail import get_connection
+        
+        # One date for the whole batch, even if it runs across midnight
+        today = today or timezone.localdate()
+        
+        # Inactive users get no email, which is most users on a typical day. The EXISTS
+        # pre-check skips building their reports (a threshold of 0 sends to everyone)
+        check_activity = getattr(settings, 'DAILY_REPORT_MIN_ACTIVITY', 1) > 0
+        reports = []
+        for user in users:
+            if check_activity and not DailyNotesReportService.had_activity_on(user, today):
+                logger.info(f"⏭️ Skipping empty daily report for {user.username}")
+                continue
+            report_data = DailyNotesReportService.generate_daily_report(user, today)
+            if DailyNotesReportService.has_activity(report_data):
+                reports.append((user, report_data))
+            else:
+                logger.info(f"⏭️ Skipping empty daily report for {user.username}")
+        
+        # With a SendGrid dynamic template every report goes out in one API call per 1000 users
+        template_id = getattr(settings, 'SENDGRID_DAILY_REPORT_TEMPLATE_ID', '')
+        if EmailService and template_id and not settings.DEBUG:
+            recipients = [
+                {
+                    'to_email': user.email,
+                    'data': DailyNotesReportService._template_data(user, report_data),
+                }
+                for user, report_data in reports if user.email
+            ]
+            sent_count = EmailService.send_template_batch(template_id, recipients)
+            logger.info(f"📧 Daily reports sent: {sent_count}")
+            return sent_count
+        
+        sent_count = 0
+        connection = get_connection(timeout=10)
+        try:
+            for user, report_data in reports:
+                if DailyNotesReportService.send_daily_report_email(user, report_data, connection=connection):
+                    sent_count += 1
+        finally:
+            connection.close()
+        
+        logger.info(f"📧 Daily reports sent: {sent_count}")
+        return sent_count
+    
+    @staticmethod
+    def _send_fallback(user, subject, text_content, html_content, connection=None):
         """Fallback email sending using Django's EmailMultiAlternatives"""
         try:
             from django.core.mail import EmailMultiAlternatives
@@ -264,7 +293,8 @@ SK LearnTrack Team
                 subject=subject,
                 body=text_content,
                 from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email]
+                to=[user.email],
+                connection=connection
             )
             
             if html_content:
@@ -5,11 +5,119 @@
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 import logging
-import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# SendGrid is optional; without it every send goes through SMTP
+try:
+    import sendgrid
+    from sendgrid.helpers.mail import Mail, Email, To, Content, Personalization
+except ImportError:
+    sendgrid = None
 
 logger = logging.getLogger(__name__)
 
+SENDGRID_TIMEOUT = 10  # seconds
+SENDGRID_MAX_PERSONALIZATIONS = 1000  # SendGrid limit per Mail Send request
+
+# Settings that feed the cached configuration status report
+_STATUS_SETTINGS = {
+    'DEBUG', 'SENDGRID_API_KEY', 'EMAIL_BACKEND', 'EMAIL_HOST', 'EMAIL_PORT', 'DEFAULT_FROM_EMAIL',
+}
+
+# Bounded background pool for async sends; threads start lazily on first submit
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='email')
+
+
+@lru_cache(maxsize=1)
+def _sendgrid_api_key():
+    """SENDGRID_API_KEY, read once per process (validated at startup in settings)"""
+    return getattr(settings, 'SENDGRID_API_KEY', '').strip()
+
+
+@receiver(setting_changed)
+def _reset_email_settings(setting, **kwargs):
+    """Drop cached email settings when they are overridden (tests)"""
+    if setting == 'SENDGRID_API_KEY':
+        _sendgrid_api_key.cache_clear()
+    if setting in _STATUS_SETTINGS:
+        _email_configuration_status.cache_clear()
+
+
+@lru_cache(maxsize=4)
+def _build_sendgrid_client(api_key):
+    """Build one SendGrid client per API key per process"""
+    sg = sendgrid.SendGridAPIClient(api_key=api_key)
+    # Per-request timeout on the client's own sockets (not process-wide)
+    sg.client.timeout = SENDGRID_TIMEOUT
+    return sg
+
+
+@lru_cache(maxsize=1)
+def _email_configuration_status():
+    """Build and log the email configuration status report"""
+    status_report = {
+        'debug_mode': settings.DEBUG,
+        'sendgrid_api_available': False,
+        'sendgrid_api_valid': False,
+        'smtp_configured': False,
+        'email_backend': settings.EMAIL_BACKEND,
+        'recommended_method': None,
+        'issues': [],
+        'from_email': settings.DEFAULT_FROM_EMAIL
+    }
+    
+    # Check SendGrid API
+    sendgrid_key = _sendgrid_api_key()
+    if sendgrid_key:
+        status_report['sendgrid_api_available'] = True
+        
+        if sendgrid_key.startswith('SG.') and len(sendgrid_key) > 20:
+            status_report['sendgrid_api_valid'] = True
+            if not settings.DEBUG:
+                status_report['recommended_method'] = 'SendGrid API'
+        else:
+            status_report['issues'].append(
+                "SendGrid API key format invalid"
+            )
+    
+    # Check SMTP
+    if settings.EMAIL_HOST and settings.EMAIL_PORT:
+        status_report['smtp_configured'] = True
+        if not status_report['recommended_method']:
+            status_report['recommended_method'] = 'SMTP'
+    
+    # Development mode
+    if settings.DEBUG:
+        status_report['recommended_method'] = 'Console (Development)'
+    
+    # Overall recommendation
+    if not status_report['recommended_method']:
+        status_report['recommended_method'] = 'NONE - Email not configured'
+        status_report['issues'].append("No email method available")
+    
+    # Log status
+    logger.info("=" * 60)
+    logger.info("📧 EMAIL CONFIGURATION STATUS")
+    logger.info(f"   Debug Mode: {status_report['debug_mode']}")
+    logger.info(f"   Backend: {status_report['email_backend']}")
+    logger.info(f"   From Email: {status_report['from_email']}")
+    logger.info(f"   SendGrid API: {'✅ Available' if status_report['sendgrid_api_available'] else '❌ Not Available'}")
+    logger.info(f"   SMTP: {'✅ Configured' if status_report['smtp_configured'] else '❌ Not Configured'}")
+    logger.info(f"   Recommended: {status_report['recommended_method']}")
+    
+    if status_report['issues']:
+        logger.warning("   Issues:")
+        for issue in status_report['issues']:
+            logger.warning(f"   - {issue}")
+    
+    logger.info("=" * 60)
+    
+    return status_report
+
 
 class EmailService:
     """
@@ -25,13 +133,15 @@ class EmailService:
         html_content=None,
         from_email=None,
         reply_to=None,
-        async_send=True  # NEW: Send asynchronously by default in production
+        async_send=True,  # NEW: Send asynchronously by default in production
+        connection=None
     ):
         """
         Send email using best available method
         
         Args:
             async_send: If True, sends email in background thread (prevents timeouts)
+            connection: Shared mail connection for batch sends (always sent synchronously)
         
         Returns:
             bool: True if email queued/sent successfully
@@ -62,34 +172,30 @@ class EmailService:
                 )
             
             # Production mode - use async sending to prevent timeouts
-            if async_send:
-                logger.info("   Method: Async (Background Thread)")
-                thread = threading.Thread(
-                    target=EmailService._send_email_sync,
-                    args=(to_email, subject, text_content, html_content, from_email, reply_to)
+            if async_send and connection is None:
+                logger.info("   Method: Async (Background Pool)")
+                _email_executor.submit(
+                    EmailService._send_email_sync,
+                    to_email, subject, text_content, html_content, from_email, reply_to
                 )
-                thread.daemon = True
-                thread.start()
                 logger.info("✅ Email queued for background sending")
                 return True
             else:
                 # Synchronous sending (not recommended in production)
                 return EmailService._send_email_sync(
-                    to_email, subject, text_content, html_content, from_email, reply_to
+                    to_email, subject, text_content, html_content, from_email, reply_to, connection
                 )
                 
-        except Exception as e:
-            logger.error(f"❌ Email sending failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Email sending failed to %s", to_email)
             return False
     
     @staticmethod
-    def _send_email_sync(to_email, subject, text_content, html_content, from_email, reply_to=None):
+    def _send_email_sync(to_email, subject, text_content, html_content, from_email, reply_to=None, connection=None):
         """Internal method for synchronous email sending"""
         try:
             # Production mode - try SendGrid first
-            sendgrid_api_key = getattr(settings, 'SENDGRID_API_KEY', '').strip()
+            sendgrid_api_key = _sendgrid_api_key()
             
             if sendgrid_api_key and len(sendgrid_api_key) > 20:
                 logger.info("   Using: SendGrid API")
@@ -115,7 +221,8 @@ class EmailService:
                 text_content=text_content,
                 html_content=html_content,
                 from_email=from_email,
-                reply_to=reply_to
+                reply_to=reply_to,
+                connection=connection
             )
             
         except Exception as e:
@@ -159,11 +266,7 @@ class EmailService:
         Send email using SendGrid API with timeout protection
         """
         try:
-            # Import SendGrid
-            try:
-                import sendgrid
-                from sendgrid.helpers.mail import Mail, Email, To, Content
-            except ImportError:
+            if sendgrid is None:
                 logger.error("❌ SendGrid library not installed")
                 logger.error("   Install with: pip install sendgrid")
                 return False
@@ -172,8 +275,8 @@ class EmailService:
             if not api_key.startswith('SG.'):
                 logger.warning("⚠️  SendGrid API key format unusual (should start with 'SG.')")
             
-            # Create SendGrid client
-            sg = sendgrid.SendGridAPIClient(api_key=api_key)
+            # Reuse the per-process SendGrid client
+            sg = _build_sendgrid_client(api_key)
             
             # Create mail object
             message = Mail(
@@ -184,41 +287,33 @@ class EmailService:
                 html_content=Content("text/html", html_content) if html_content else None
             )
             
-            # Send with SHORT timeout to prevent worker hangs
-            import socket
-            original_timeout = socket.getdefaulttimeout()
-            socket.setdefaulttimeout(10)  # 10 second timeout
+            # Send with SHORT timeout (set on the client) to prevent worker hangs
+            response = sg.send(message)
             
-            try:
-                response = sg.send(message)
+            logger.info(f"   SendGrid Status: {response.status_code}")
+            
+            if response.status_code == 202:
+                logger.info(f"✅ Email accepted by SendGrid for delivery to {to_email}")
+                return True
                 
-                logger.info(f"   SendGrid Status: {response.status_code}")
+            elif response.status_code == 401:
+                logger.error("❌ SendGrid 401: Invalid API key")
+                return False
                 
-                if response.status_code == 202:
-                    logger.info(f"✅ Email accepted by SendGrid for delivery to {to_email}")
-                    return True
-                    
-                elif response.status_code == 401:
-                    logger.error("❌ SendGrid 401: Invalid API key")
-                    return False
-                    
-                elif response.status_code == 403:
-                    error_body = response.body.decode('utf-8') if response.body else "No details"
-                    logger.error(f"❌ SendGrid 403 Forbidden: {error_body}")
-                    logger.error("")
-                    logger.error("🔧 SENDER EMAIL NOT VERIFIED IN SENDGRID!")
-                    logger.error(f"   Verify: {from_email}")
-                    logger.error("   Go to: https://app.sendgrid.com/settings/sender_auth")
-                    logger.error("")
-                    return False
-                    
-                else:
-                    error_body = response.body.decode('utf-8') if response.body else "Unknown error"
-                    logger.error(f"❌ SendGrid Error {response.status_code}: {error_body}")
-                    return False
-                    
-            finally:
-                socket.setdefaulttimeout(original_timeout)
+            elif response.status_code == 403:
+                error_body = response.body.decode('utf-8') if response.body else "No details"
+                logger.error(f"❌ SendGrid 403 Forbidden: {error_body}")
+                logger.error("")
+                logger.error("🔧 SENDER EMAIL NOT VERIFIED IN SENDGRID!")
+                logger.error(f"   Verify: {from_email}")
+                logger.error("   Go to: https://app.sendgrid.com/settings/sender_auth")
+                logger.error("")
+                return False
+                
+            else:
+                error_body = response.body.decode('utf-8') if response.body else "Unknown error"
+                logger.error(f"❌ SendGrid Error {response.status_code}: {error_body}")
+                return False
                 
         except Exception as e:
             error_msg = str(e)
@@ -226,9 +321,59 @@ class EmailService:
             return False
     
     @staticmethod
-    def _send_via_smtp(to_email, subject, text_content, html_content, from_email, reply_to=None):
+    def send_template_batch(template_id, recipients, from_email=None):
+        """
+        Send a SendGrid dynamic template to many recipients, one API call per 1000
+        
+        Args:
+            template_id: SendGrid dynamic template ID
+            recipients: List of dicts with 'to_email' and 'data' (template data)
+        
+        Returns:
+            int: Number of recipients accepted by SendGrid
+        """
+        api_key = _sendgrid_api_key()
+        if not api_key or not template_id:
+            logger.error("❌ SendGrid batch send needs SENDGRID_API_KEY and a template ID")
+            return 0
+        
+        if sendgrid is None:
+            logger.error("❌ SendGrid library not installed")
+            return 0
+        
+        sg = _build_sendgrid_client(api_key)
+        from_email = from_email or settings.DEFAULT_FROM_EMAIL
+        accepted = 0
+        
+        for start in range(0, len(recipients), SENDGRID_MAX_PERSONALIZATIONS):
+            chunk = recipients[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+            message = Mail(from_email=Email(from_email))
+            message.template_id = template_id
+            for recipient in chunk:
+                personalization = Personalization()
+                personalization.add_to(To(recipient['to_email']))
+                personalization.dynamic_template_data = recipient['data']
+                message.add_personalization(personalization)
+            
+            try:
+                response = sg.send(message)
+                if response.status_code == 202:
+                    accepted += len(chunk)
+                    logger.info(f"✅ SendGrid accepted batch of {len(chunk)} emails")
+                else:
+                    logger.error(f"❌ SendGrid batch error {response.status_code}")
+            except Exception as e:
+                logger.error(f"❌ SendGrid batch exception: {str(e)}")
+        
+        return accepted
+    
+    @staticmethod
+    def _send_via_smtp(to_email, subject, text_content, html_content, from_email, reply_to=None, connection=None):
         """
         Send email using SMTP with timeout protection
+        
+        A passed-in connection is opened on first use and left open for the caller to close;
+        otherwise a connection is opened and closed for this one message.
         """
         try:
             # Check SMTP configuration
@@ -236,6 +381,11 @@ class EmailService:
                 logger.error("❌ EMAIL_HOST not configured")
                 return False
             
+            if connection is None:
+                connection = get_connection(timeout=10)  # 10 second timeout
+            else:
+                connection.open()  # No-op once open, so the batch reuses one session
+            
             # Create email message with SHORT timeout
             email = EmailMultiAlternatives(
                 subject=subject,
@@ -243,7 +393,7 @@ class EmailService:
                 from_email=from_email,
                 to=[to_email],
                 reply_to=[reply_to or from_email],
-                connection=get_connection(timeout=10)  # 10 second timeout
+                connection=connection
             )
             
             if html_content:
@@ -262,62 +412,8 @@ class EmailService:
     def test_email_configuration():
         """
         Test email configuration and return status
-        """
-        status_report = {
-            'debug_mode': settings.DEBUG,
-            'sendgrid_api_available': False,
-            'sendgrid_api_valid': False,
-            'smtp_configured': False,
-            'email_backend': settings.EMAIL_BACKEND,
-            'recommended_method': None,
-            'issues': [],
-            'from_email': settings.DEFAULT_FROM_EMAIL
-        }
-        
-        # Check SendGrid API
-        sendgrid_key = getattr(settings, 'SENDGRID_API_KEY', '').strip()
-        if sendgrid_key:
-            status_report['sendgrid_api_available'] = True
-            
-            if sendgrid_key.startswith('SG.') and len(sendgrid_key) > 20:
-                status_report['sendgrid_api_valid'] = True
-                if not settings.DEBUG:
-                    status_report['recommended_method'] = 'SendGrid API'
-            else:
-                status_report['issues'].append(
-                    "SendGrid API key format invalid"
-                )
-        
-        # Check SMTP
-        if settings.EMAIL_HOST and settings.EMAIL_PORT:
-            status_report['smtp_configured'] = True
-            if not status_report['recommended_method']:
-                status_report['recommended_method'] = 'SMTP'
-        
-        # Development mode
-        if settings.DEBUG:
-            status_report['recommended_method'] = 'Console (Development)'
-        
-        # Overall recommendation
-        if not status_report['recommended_method']:
-            status_report['recommended_method'] = 'NONE - Email not configured'
-            status_report['issues'].append("No email method available")
         
-        # Log status
-        logger.info("=" * 60)
-        logger.info("📧 EMAIL CONFIGURATION STATUS")
-        logger.info(f"   Debug Mode: {status_report['debug_mode']}")
-        logger.info(f"   Backend: {status_report['email_backend']}")
-        logger.info(f"   From Email: {status_report['from_email']}")
-        logger.info(f"   SendGrid API: {'✅ Available' if status_report['sendgrid_api_available'] else '❌ Not Available'}")
-        logger.info(f"   SMTP: {'✅ Configured' if status_report['smtp_configured'] else '❌ Not Configured'}")
-        logger.info(f"   Recommended: {status_report['recommended_method']}")
-        
-        if status_report['issues']:
-            logger.warning("   Issues:")
-            for issue in status_report['issues']:
-                logger.warning(f"   - {issue}")
-        
-        logger.info("=" * 60)
-        
-        return status_report
\ No newline at end of file
+        The status only changes with settings, so it is computed (and logged) once per process.
+        """
+        status_report = _email_configuration_status()
+        return dict(status_report, issues=list(status_report['issues']))
@@ -5,13 +5,21 @@ from django.http import HttpResponse
 from django.views import View
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.template.loader import get_template
 import os
-import pickle
+import re
+import hashlib
 import logging
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
 from google_auth_oauthlib.flow import Flow
+from .google_drive_service import save_credentials, has_stored_credentials, GOOGLE_HTTP_ADAPTER
 import json
 
 logger = logging.getLogger(__name__)
+User = get_user_model()
 
 # ✅ CRITICAL FIX: Include ALL scopes that Google adds
 SCOPES = [
@@ -21,22 +29,92 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive.file'
 ]
 
+# Used only if settings don't define GOOGLE_DRIVE_REDIRECT_URI (Render default)
+_FALLBACK_REDIRECT_URI = 'https://sk-learntrack-pkw6.onrender.com/api/notes/google-callback/'
+
+# ✅ CRITICAL FIX: For Render production, set once at import rather than per callback
+if not settings.DEBUG:
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '0'
+
+# State is issued as "<user_id>:<token>" (older links used "_")
+_STATE_USER_ID = re.compile(r'^(\d+)[:_]')
+# Google codes and our states are far shorter; anything longer is garbage
+MAX_STATE_LENGTH = 512
+MAX_CODE_LENGTH = 2048
+
+
+@lru_cache(maxsize=4)
+def _client_config(client_id, client_secret, redirect_uri):
+    """OAuth client configuration, built once per credential set"""
+    return {
+        "web": {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "redirect_uris": [redirect_uri]
+        }
+    }
+
+
+@lru_cache(maxsize=1)
+def _oauth_templates():
+    """Compiled success and error pages for the callback, resolved once per process"""
+    return (
+        get_template('notes/oauth/success.html'),
+        get_template('notes/oauth/error.html'),
+    )
+
+
+# Per-user locks so a double-delivered callback can't exchange/write tokens twice;
+# weak values drop a user's lock once no callback holds it
+_user_locks = weakref.WeakValueDictionary()
+_user_locks_guard = threading.Lock()
+# Digest of the last authorization code exchanged per user (bounded LRU)
+_exchanged_codes = OrderedDict()
+EXCHANGED_CODES_MAX = 1024
+
+# Seconds to wait for Google's token endpoint, and for another callback's exchange
+TOKEN_EXCHANGE_TIMEOUT = 15
+USER_LOCK_TIMEOUT = 20
+
+
+def _user_lock(user_id):
+    """Return the token-exchange lock for a user"""
+    with _user_locks_guard:
+        lock = _user_locks.get(user_id)
+        if lock is None:
+            lock = _user_locks[user_id] = threading.Lock()
+        return lock
+
+
+def _remember_exchanged_code(user_id, code):
+    """Record the code just exchanged for a user, evicting the oldest entries"""
+    with _user_locks_guard:
+        _exchanged_codes[user_id] = _code_digest(code)
+        _exchanged_codes.move_to_end(user_id)
+        while len(_exchanged_codes) > EXCHANGED_CODES_MAX:
+            _exchanged_codes.popitem(last=False)
+
+
+def _code_digest(code):
+    """Hash an authorization code so the raw value is never kept in memory"""
+    return hashlib.sha256(code.encode()).hexdigest()
+
 
 class GoogleOAuthCallbackView(View):
     """Handle Google OAuth callback (separate from DRF views)"""
     
     def get(self, request):
+        lock = None
         try:
             # Get state and code from URL
             state = request.GET.get('state')
             code = request.GET.get('code')
             error = request.GET.get('error')
             
-            logger.info(f"🔐 Google callback received")
-            logger.info(f"   State: {state[:20] if state else 'None'}...")
-            logger.info(f"   Code: {code[:20] if code else 'None'}...")
-            logger.info(f"   Error: {error}")
-            logger.info(f"   Session keys: {list(request.session.keys())}")
+            logger.info("🔐 Google callback received")
+            logger.debug("   State present: %s, code present: %s, error: %s", bool(state), bool(code), error)
             
             # Check for OAuth errors
             if error:
@@ -47,30 +125,27 @@ class GoogleOAuthCallbackView(View):
                 logger.error("❌ Missing authentication parameters")
                 return self._error_response("Missing authentication parameters")
             
+            # Reject malformed parameters before touching the session store
+            state_match = _STATE_USER_ID.match(state)
+            if len(state) > MAX_STATE_LENGTH or len(code) > MAX_CODE_LENGTH or not state_match:
+                logger.error("❌ Malformed state or code parameter")
+                return self._error_response("Invalid state parameter")
+            
             # Try to get user_id from session first
             user_id = request.session.get('google_auth_user_id')
             
             if not user_id:
-                # Try to extract from state (colon format: userid:token)
-                try:
-                    if ':' in state:
-                        user_id = int(state.split(':')[0])
-                        logger.info(f"✅ Extracted user_id from state: {user_id}")
-                    elif '_' in state:
-                        user_id = int(state.split('_')[0])
-                        logger.info(f"✅ Extracted user_id from state: {user_id}")
-                except (ValueError, IndexError):
-                    logger.error(f"❌ Could not extract user_id from state: {state}")
-                    return self._error_response("Invalid state parameter")
+                # Fall back to the state (userid:token or userid_token)
+                user_id = int(state_match.group(1))
+                logger.info(f"✅ Extracted user_id from state: {user_id}")
             
             if not user_id:
                 logger.error("❌ No user_id found in session or state")
                 return self._error_response("Session expired")
             
-            # Get user
-            User = get_user_model()
+            # Get user (only the fields the callback reads)
             try:
-                user = User.objects.get(id=user_id)
+                user = User.objects.only('id', 'email').get(id=user_id)
                 logger.info(f"✅ Found user: {user.email} (ID: {user.id})")
             except User.DoesNotExist:
                 logger.error(f"❌ User with id {user_id} not found")
@@ -80,14 +155,7 @@ class GoogleOAuthCallbackView(View):
             client_id = settings.GOOGLE_OAUTH_CLIENT_ID
             client_secret = settings.GOOGLE_OAUTH_CLIENT_SECRET
             
-            # ✅ CRITICAL: Log credentials info (not full values)
-            logger.info(f"🔐 Checking Google OAuth configuration:")
-            logger.info(f"   Client ID exists: {bool(client_id)}")
-            logger.info(f"   Client Secret exists: {bool(client_secret)}")
-            
-            if client_id:
-                logger.info(f"   Client ID first 10: {client_id[:10]}...")
-                logger.info(f"   Client ID length: {len(client_id)}")
+            logger.debug("🔐 Client ID set: %s, client secret set: %s", bool(client_id), bool(client_secret))
             
             if not client_id or not client_secret:
                 logger.error("❌ Google OAuth credentials not configured in settings")
@@ -98,27 +166,23 @@ class GoogleOAuthCallbackView(View):
                 logger.error(f"❌ Invalid client_id format: {client_id}")
                 return self._error_response(f"Invalid client ID format: {client_id}")
             
+            # Serialize the exchange per user; skip codes already exchanged
+            user_lock = _user_lock(user.id)
+            if not user_lock.acquire(timeout=USER_LOCK_TIMEOUT):
+                logger.error(f"❌ Timed out waiting for another token exchange for user {user.id}")
+                return self._error_response("Another connection attempt is still in progress. Please try again.")
+            lock = user_lock
+            if _exchanged_codes.get(user.id) == _code_digest(code) and has_stored_credentials(user.id):
+                logger.info(f"ℹ️ Authorization code already exchanged for user {user.id}")
+                return self._success_response(user)
+            
             # Create redirect URI
             redirect_uri = self._get_redirect_uri()
             logger.info(f"🔗 Using redirect URI: {redirect_uri}")
             
             try:
                 # ✅ CRITICAL FIX: Use proper client configuration
-                client_config = {
-                    "web": {
-                        "client_id": client_id,
-                        "client_secret": client_secret,
-                        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                        "token_uri": "https://oauth2.googleapis.com/token",
-                        "redirect_uris": [redirect_uri]
-                    }
-                }
-                
-                logger.info(f"🔐 Client config created")
-                logger.info(f"   Auth URI: {client_config['web']['auth_uri']}")
-                logger.info(f"   Token URI: {client_config['web']['token_uri']}")
-                logger.info(f"   Redirect URI in config: {client_config['web']['redirect_uris'][0]}")
-                logger.info(f"   Using scopes: {SCOPES}")
+                client_config = _client_config(client_id, client_secret, redirect_uri)
                 
                 # ✅ CRITICAL FIX: Use ALL scopes
                 flow = Flow.from_client_config(
@@ -126,75 +190,47 @@ class GoogleOAuthCallbackView(View):
                     scopes=SCOPES,  # Include ALL scopes
                     redirect_uri=redirect_uri
                 )
+                flow.oauth2session.mount("https://", GOOGLE_HTTP_ADAPTER)
                 
                 # Set the state to match what was passed
                 flow.state = state
                 
-                # ✅ CRITICAL FIX: For Render production, ensure HTTPS
-                if not settings.DEBUG:
-                    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '0'
-                
                 # Fetch token
                 logger.info(f"🔄 Exchanging code for token...")
                 flow.fetch_token(
                     authorization_response=request.build_absolute_uri(),
-                    code=code
+                    code=code,
+                    timeout=TOKEN_EXCHANGE_TIMEOUT
                 )
                 
                 credentials = flow.credentials
                 
-                logger.info(f"✅ Successfully obtained credentials")
-                logger.info(f"   Access token obtained: {bool(credentials.token)}")
-                logger.info(f"   Refresh token obtained: {bool(credentials.refresh_token)}")
-                logger.info(f"   Scopes granted: {credentials.scopes}")
-                logger.info(f"   Expires at: {credentials.expiry}")
+                logger.info("✅ Successfully obtained credentials")
+                logger.debug(
+                    "   Refresh token obtained: %s, scopes: %s, expires at: %s",
+                    bool(credentials.refresh_token), credentials.scopes, credentials.expiry,
+                )
                 
             except Exception as e:
-                logger.error(f"❌ Error fetching token: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception("❌ Error fetching token")
                 
                 # ✅ CRITICAL: Provide specific error guidance
                 error_msg = str(e)
                 if 'invalid_client' in error_msg.lower():
-                    guidance = """
-                    <div style="background: #fee2e2; border-left: 4px solid #dc2626; padding: 15px; margin: 20px 0; border-radius: 4px;">
-                        <h4 style="margin-top: 0; color: #991b1b;">Possible Solutions:</h4>
-                        <ol style="margin: 10px 0; padding-left: 20px;">
-                            <li>Check that GOOGLE_OAUTH_CLIENT_ID and GOOGLE_OAUTH_CLIENT_SECRET are correctly set in your Render environment variables</li>
-                            <li>Ensure the Client ID ends with ".apps.googleusercontent.com"</li>
-                            <li>Verify the redirect URI in Google Cloud Console matches: <code>{redirect_uri}</code></li>
-                            <li>Make sure the OAuth consent screen is configured with all required scopes</li>
-                            <li>Check that your Google Cloud project has the Drive API enabled</li>
-                        </ol>
-                        <p style="margin: 10px 0; color: #991b1b;"><strong>Check your Render environment variables:</strong></p>
-                        <pre style="background: #f5f5f5; padding: 10px; border-radius: 4px; font-size: 12px;">
-GOOGLE_OAUTH_CLIENT_ID=your-client-id.apps.googleusercontent.com
-GOOGLE_OAUTH_CLIENT_SECRET=your-client-secret
-BACKEND_URL=https://sk-learntrack-pkw6.onrender.com
-                        </pre>
-                    </div>
-                    """.format(redirect_uri=redirect_uri)
-                    
-                    return self._error_response(f"Invalid Client Configuration<br><br>{guidance}")
+                    return self._error_response("Invalid Client Configuration", redirect_uri=redirect_uri)
                 else:
                     return self._error_response(f"Token exchange failed: {error_msg}")
             
             # Save credentials
-            token_dir = os.path.join(settings.MEDIA_ROOT, 'google_tokens')
-            os.makedirs(token_dir, exist_ok=True)
-            token_path = os.path.join(token_dir, f'token_{user.id}.pickle')
-            
             try:
-                with open(token_path, 'wb') as token:
-                    pickle.dump(credentials, token)
+                save_credentials(user.id, credentials)
+                _remember_exchanged_code(user.id, code)
                 
-                logger.info(f"✅ Saved credentials to {token_path}")
+                logger.info(f"✅ Saved credentials for user {user.id}")
                 
                 # Clear session data
-                for key in ['google_auth_state', 'google_auth_user_id']:
-                    if key in request.session:
-                        del request.session[key]
+                request.session.pop('google_auth_state', None)
+                request.session.pop('google_auth_user_id', None)
                 
                 return self._success_response(user)
                 
@@ -203,171 +239,21 @@ BACKEND_URL=https://sk-learntrack-pkw6.onrender.com
                 return self._error_response(f"Failed to save credentials: {str(e)}")
                 
         except Exception as e:
-            logger.error(f"❌ OAuth callback error: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("❌ OAuth callback error")
             return self._error_response(f"Authentication failed: {str(e)}")
+        finally:
+            if lock is not None:
+                lock.release()
     
     def _get_redirect_uri(self):
-        """Get the correct redirect URI for production"""
-        # Always use BACKEND_URL from settings
-        if hasattr(settings, 'BACKEND_URL'):
-            redirect_uri = f"{settings.BACKEND_URL}/api/notes/google-callback/"
-            logger.info(f"🔐 Using BACKEND_URL from settings: {settings.BACKEND_URL}")
-        else:
-            # Fallback for Render
-            redirect_uri = 'https://sk-learntrack-pkw6.onrender.com/api/notes/google-callback/'
-            logger.warning(f"⚠️ BACKEND_URL not set, using fallback: {redirect_uri}")
-        
-        return redirect_uri
+        """Get the correct redirect URI for production (resolved once in settings)"""
+        return getattr(settings, 'GOOGLE_DRIVE_REDIRECT_URI', None) or _FALLBACK_REDIRECT_URI
     
-    def _error_response(self, error_message):
-        """Generate error response HTML"""
-        return HttpResponse(f"""
-            <html>
-            <head>
-                <title>Token Exchange Failed</title>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        display: flex;
-                        justify-content: center;
-                        align-items: center;
-                        height: 100vh;
-                        margin: 0;
-                        background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                    }}
-                    .container {{
-                        background: white;
-                        padding: 40px;
-                        border-radius: 10px;
-                        box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-                        text-align: center;
-                        max-width: 600px;
-                        margin: 20px;
-                    }}
-                    .error-icon {{
-                        font-size: 64px;
-                        color: #ef4444;
-                        margin-bottom: 20px;
-                    }}
-                    h1 {{ color: #1f2937; margin: 0 0 10px 0; }}
-                    p {{ color: #6b7280; margin: 10px 0; }}
-                    code {{ 
-                        background: #f3f4f6; 
-                        padding: 10px; 
-                        border-radius: 4px;
-                        font-size: 12px;
-                        display: block;
-                        margin: 10px 0;
-                        word-wrap: break-word;
-                        text-align: left;
-                    }}
-                    .guidance {{
-                        background: #fee2e2;
-                        border-left: 4px solid #dc2626;
-                        padding: 15px;
-                        margin: 20px 0;
-                        border-radius: 4px;
-                        text-align: left;
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="error-icon">❌</div>
-                    <h1>Token Exchange Failed</h1>
-                    <p>There was an error connecting to Google Drive.</p>
-                    <code>{error_message}</code>
-                    <p style="margin-top: 20px;">Please try connecting again.</p>
-                </div>
-                <script>
-                    // Send error message to opener
-                    try {{
-                        if (window.opener && !window.opener.closed) {{
-                            window.opener.postMessage({{
-                                type: 'google-auth-error',
-                                error: 'Token exchange failed'
-                            }}, '*');
-                        }}
-                    }} catch(e) {{
-                        console.log('Could not send error to opener:', e);
-                    }}
-                    
-                    setTimeout(function() {{
-                        window.close();
-                    }}, 5000);
-                </script>
-            </body>
-            </html>
-        """, status=400)
+    def _error_response(self, error_message, redirect_uri=None):
+        """Generate error response HTML (with setup guidance when redirect_uri is given)"""
+        context = {'error_message': error_message, 'redirect_uri': redirect_uri}
+        return HttpResponse(_oauth_templates()[1].render(context), status=400)
     
     def _success_response(self, user):
         """Generate success response HTML"""
-        return HttpResponse(f"""
-            <html>
-            <head>
-                <title>Google Drive Connected</title>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        display: flex;
-                        justify-content: center;
-                        align-items: center;
-                        height: 100vh;
-                        margin: 0;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    }}
-                    .container {{
-                        background: white;
-                        padding: 40px;
-                        border-radius: 10px;
-                        box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-                        text-align: center;
-                        max-width: 500px;
-                        margin: 20px;
-                    }}
-                    .success-icon {{
-                        font-size: 64px;
-                        color: #10b981;
-                        margin-bottom: 20px;
-                    }}
-                    h1 {{ color: #1f2937; margin: 0 0 10px 0; }}
-                    p {{ color: #6b7280; margin: 0; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="success-icon">✓</div>
-                    <h1>Google Drive Connected!</h1>
-                    <p>Your account has been successfully linked with Google Drive.</p>
-                    <p>You can now export notes directly to your Google Drive.</p>
-                    <p style="margin-top: 20px; font-size: 14px;">This window will close automatically...</p>
-                </div>
-                <script>
-                    // Send success message to opener
-                    try {{
-                        if (window.opener && !window.opener.closed) {{
-                            window.opener.postMessage({{
-                                type: 'google-auth-success',
-                                message: 'Google Drive connected successfully!',
-                                userId: {user.id}
-                            }}, '*');
-                            
-                            // Also trigger a page reload to refresh auth status
-                            setTimeout(function() {{
-                                window.opener.location.reload();
-                            }}, 1000);
-                        }}
-                    }} catch(e) {{
-                        console.log('Could not send message to opener:', e);
-                    }}
-                    
-                    // Auto-close after 2 seconds
-                    setTimeout(function() {{
-                        window.close();
-                    }}, 2000);
-                </script>
-            </body>
-            </html>
-        """)
\ No newline at end of file
+        return HttpResponse(_oauth_templates()[0].render({'user_id': user.id}))
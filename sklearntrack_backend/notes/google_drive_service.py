@@ -9,14 +9,20 @@ from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
 from googleapiclient.errors import HttpError
+from requests.adapters import HTTPAdapter
+import requests
 from django.conf import settings
 from django.utils import timezone
-from django.contrib.auth import get_user_model
+from .models import GoogleDriveToken
 import os
 import pickle
+import json
 import logging
 import secrets
+import threading
 from io import BytesIO
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -31,6 +37,108 @@ SCOPES = [
 
 FOLDER_NAME = 'SK-LearnTrack Notes'
 
+# One keep-alive pool per process for Google's OAuth endpoints: token exchanges
+# and refreshes reuse the TCP/TLS connection instead of handshaking each time
+GOOGLE_HTTP_ADAPTER = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+_session = requests.Session()
+_session.mount("https://", GOOGLE_HTTP_ADAPTER)
+
+
+def _legacy_token_paths(user_id):
+    """Per-user token files used before tokens moved into the database"""
+    token_dir = os.path.join(settings.MEDIA_ROOT, 'google_tokens')
+    return (
+        os.path.join(token_dir, f'token_{user_id}.json'),
+        os.path.join(token_dir, f'token_{user_id}.pickle'),
+    )
+
+
+def save_credentials(user_id, creds):
+    """Store a user's credentials as authorized-user JSON"""
+    GoogleDriveToken.objects.update_or_create(
+        user_id=user_id, defaults={'token_json': creds.to_json()}
+    )
+
+
+@lru_cache(maxsize=256)
+def _credentials_from_json(token_json):
+    """Parse stored token JSON; unchanged tokens reuse the parsed object"""
+    info = json.loads(token_json)
+    # Google doesn't always return a refresh token; the key must still be present
+    info.setdefault('refresh_token', None)
+    return Credentials.from_authorized_user_info(info)
+
+
+def _import_legacy_token(user_id):
+    """Move a token file from MEDIA_ROOT into the database, if there is one"""
+    json_path, pickle_path = _legacy_token_paths(user_id)
+    try:
+        with open(json_path) as token:
+            creds = _credentials_from_json(token.read())
+        legacy_path = json_path
+    except FileNotFoundError:
+        try:
+            with open(pickle_path, 'rb') as token:
+                creds = pickle.load(token)
+        except FileNotFoundError:
+            return None
+        legacy_path = pickle_path
+    save_credentials(user_id, creds)
+    os.remove(legacy_path)
+    logger.info(f"✅ Moved stored credentials into the database for user {user_id}")
+    return creds
+
+
+def load_credentials(user_id):
+    """Load a user's stored credentials, or None if Drive isn't connected"""
+    token_json = GoogleDriveToken.objects.filter(user_id=user_id).values_list('token_json', flat=True).first()
+    if token_json is not None:
+        return _credentials_from_json(token_json)
+    return _import_legacy_token(user_id)
+
+
+def has_stored_credentials(user_id):
+    """Whether a token is stored for the user"""
+    return (
+        GoogleDriveToken.objects.filter(user_id=user_id).exists()
+        or any(os.path.exists(path) for path in _legacy_token_paths(user_id))
+    )
+
+
+def delete_credentials(user_id):
+    """Remove a user's stored token; False if there was none"""
+    deleted, _ = GoogleDriveToken.objects.filter(user_id=user_id).delete()
+    for path in _legacy_token_paths(user_id):
+        try:
+            os.remove(path)
+            deleted = True
+        except FileNotFoundError:
+            pass
+    return bool(deleted)
+
+
+# Drive clients are kept per thread: httplib2 isn't thread-safe, and thread
+# idents are recycled, so they can't key a process-wide cache
+_drive_clients = threading.local()
+DRIVE_CLIENTS_PER_THREAD = 32
+
+
+def _drive_service(creds):
+    """Drive client for these credentials, built and reused on the calling thread"""
+    clients = getattr(_drive_clients, 'by_creds', None)
+    if clients is None:
+        clients = _drive_clients.by_creds = OrderedDict()
+    service = clients.get(creds)
+    if service is None:
+        # The discovery document ships with googleapiclient; never fetch or file-cache it
+        service = build('drive', 'v3', credentials=creds, cache_discovery=False, static_discovery=True)
+        clients[creds] = service
+        if len(clients) > DRIVE_CLIENTS_PER_THREAD:
+            clients.popitem(last=False)
+    else:
+        clients.move_to_end(creds)
+    return service
+
 
 class GoogleDriveService:
     """Unified Google Drive integration service"""
@@ -41,38 +149,28 @@ class GoogleDriveService:
         self.service = None
         self._authenticate()
     
-    def _get_token_path(self):
-        """Get secure token storage path for user"""
-        token_dir = os.path.join(settings.MEDIA_ROOT, 'google_tokens')
-        os.makedirs(token_dir, exist_ok=True)
-        return os.path.join(token_dir, f'token_{self.user.id}.pickle')
-    
     def _authenticate(self):
         """Authenticate with Google Drive API"""
-        token_path = self._get_token_path()
-        
         # Load existing credentials
-        if os.path.exists(token_path):
-            try:
-                with open(token_path, 'rb') as token:
-                    self.creds = pickle.load(token)
+        try:
+            self.creds = load_credentials(self.user.id)
+            if self.creds:
                 logger.info(f"✅ Loaded credentials for user {self.user.id}")
-            except (pickle.PickleError, EOFError, KeyError) as e:
-                logger.error(f"❌ Corrupted token file for user {self.user.id}: {e}")
-                self.creds = None
-            except Exception as e:
-                logger.error(f"❌ Error loading credentials for user {self.user.id}: {e}")
-                self.creds = None
+        except (pickle.PickleError, EOFError, KeyError, ValueError) as e:
+            logger.error(f"❌ Corrupted token file for user {self.user.id}: {e}")
+            self.creds = None
+        except Exception as e:
+            logger.error(f"❌ Error loading credentials for user {self.user.id}: {e}")
+            self.creds = None
         
         # Refresh or validate credentials
         if self.creds:
             if self.creds.expired and self.creds.refresh_token:
                 try:
                     logger.info(f"🔄 Refreshing credentials for user {self.user.id}")
-                    self.creds.refresh(Request())
+                    self.creds.refresh(Request(session=_session))
                     # Save refreshed credentials
-                    with open(token_path, 'wb') as token:
-                        pickle.dump(self.creds, token)
+                    save_credentials(self.user.id, self.creds)
                     logger.info(f"✅ Refreshed credentials for user {self.user.id}")
                 except Exception as e:
                     logger.error(f"❌ Error refreshing credentials for user {self.user.id}: {e}")
@@ -83,7 +181,7 @@ class GoogleDriveService:
         
         # Build service
         try:
-            self.service = build('drive', 'v3', credentials=self.creds)
+            self.service = _drive_service(self.creds)
             logger.info(f"✅ Drive service built for user {self.user.id}")
         except Exception as e:
             logger.error(f"❌ Error building Drive service for user {self.user.id}: {e}")
@@ -91,14 +189,9 @@ class GoogleDriveService:
     
     def is_connected(self):
         """Check if user has valid Drive connection"""
-        token_path = self._get_token_path()
-        if not os.path.exists(token_path):
-            return False
-        
         try:
-            with open(token_path, 'rb') as token:
-                creds = pickle.load(token)
-            return creds and creds.valid
+            creds = load_credentials(self.user.id)
+            return bool(creds and creds.valid)
         except Exception as e:
             logger.error(f"❌ Error checking connection for user {self.user.id}: {e}")
             return False
@@ -152,7 +245,7 @@ class GoogleDriveService:
             logger.error(f"❌ Unexpected error for user {self.user.id}: {e}")
             raise
     
-    def upload_or_update_pdf(self, pdf_file, filename, existing_file_id=None):
+    def upload_or_update_pdf(self, pdf_file, filename, existing_file_id=None, folder_id=None):
         """
         Upload new PDF or update existing one
         
@@ -160,6 +253,7 @@ class GoogleDriveService:
             pdf_file: BytesIO PDF content
             filename: Name for the file
             existing_file_id: If provided, updates existing file
+            folder_id: Target folder, looked up only if a new file is created
             
         Returns:
             dict: File metadata
@@ -169,8 +263,6 @@ class GoogleDriveService:
             if hasattr(pdf_file, 'seek'):
                 pdf_file.seek(0)
             
-            folder_id = self.get_or_create_folder()
-            
             media = MediaIoBaseUpload(
                 pdf_file,
                 mimetype='application/pdf',
@@ -204,6 +296,9 @@ class GoogleDriveService:
                         raise
             
             # CREATE new file
+            if not folder_id:
+                folder_id = self.get_or_create_folder()
+            
             file_metadata = {
                 'name': filename,
                 'parents': [folder_id],
@@ -384,6 +479,7 @@ class GoogleAuthService:
                 scopes=SCOPES,  # ✅ CRITICAL: Use all scopes
                 redirect_uri=redirect_uri
             )
+            flow.oauth2session.mount("https://", GOOGLE_HTTP_ADAPTER)
             
             # Generate authorization URL
             authorization_url, _ = flow.authorization_url(
@@ -399,134 +495,19 @@ class GoogleAuthService:
             return authorization_url
             
         except Exception as e:
-            logger.error(f"❌ Auth URL generation error: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            raise
-    
-    @staticmethod
-    def handle_callback(request):
-        """Handle Google OAuth callback - SCOPE FIX"""
-        try:
-            # Get parameters
-            code = request.GET.get('code')
-            state = request.GET.get('state')
-            error = request.GET.get('error')
-            
-            # Log everything for debugging
-            logger.info("=" * 60)
-            logger.info("🔐 OAUTH CALLBACK RECEIVED")
-            logger.info(f"   Code: {code[:20] if code else 'None'}...")
-            logger.info(f"   State: {state[:20] if state else 'None'}...")
-            logger.info(f"   Error: {error}")
-            logger.info(f"   Session keys: {list(request.session.keys())}")
-            logger.info("=" * 60)
-            
-            # Check for OAuth errors
-            if error:
-                logger.error(f"❌ OAuth error: {error}")
-                raise Exception(f"OAuth error: {error}")
-            
-            if not code or not state:
-                raise Exception("Missing code or state parameter")
-            
-            # Validate state token
-            session_state = request.session.get('google_auth_state')
-            user_id = request.session.get('google_auth_user_id')
-            
-            logger.info(f"🔍 State validation:")
-            logger.info(f"   Received: {state[:20]}...")
-            logger.info(f"   Session: {session_state[:20] if session_state else 'None'}...")
-            logger.info(f"   User ID: {user_id}")
-            
-            if not session_state or not user_id:
-                # Try to extract from state as fallback
-                if ':' in state:
-                    try:
-                        user_id = int(state.split(':')[0])
-                        logger.info(f"✅ Extracted user_id from state: {user_id}")
-                    except (ValueError, IndexError):
-                        raise Exception("Invalid state parameter - could not extract user ID")
-                else:
-                    raise Exception("Session expired or invalid - no state found")
-            elif state != session_state:
-                raise Exception(f"State mismatch - CSRF protection triggered")
-            
-            # Get user
-            User = get_user_model()
-            try:
-                user = User.objects.get(id=user_id)
-                logger.info(f"✅ Found user: {user.email} (ID: {user.id})")
-            except User.DoesNotExist:
-                raise Exception(f"User not found: {user_id}")
-            
-            # Get client configuration
-            client_config = GoogleAuthService._get_client_config()
-            redirect_uri = GoogleAuthService._get_redirect_uri()
-            
-            # Create flow with ALL scopes
-            flow = Flow.from_client_config(
-                client_config,
-                scopes=SCOPES,  # ✅ CRITICAL: Use all scopes
-                state=state,
-                redirect_uri=redirect_uri
-            )
-            
-            # Fetch token
-            logger.info(f"🔄 Exchanging code for token with scopes: {SCOPES}...")
-            flow.fetch_token(
-                authorization_response=request.build_absolute_uri(),
-                code=code
-            )
-            credentials = flow.credentials
-            
-            logger.info(f"✅ Token exchange successful")
-            logger.info(f"   Access token: {credentials.token[:20]}...")
-            logger.info(f"   Refresh token: {credentials.refresh_token[:20] if credentials.refresh_token else 'None'}...")
-            logger.info(f"   Expires at: {credentials.expiry}")
-            logger.info(f"   Scopes granted: {credentials.scopes}")
-            
-            # Save credentials
-            drive_service = GoogleDriveService.__new__(GoogleDriveService)
-            drive_service.user = user
-            token_path = drive_service._get_token_path()
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(token_path), exist_ok=True)
-            
-            with open(token_path, 'wb') as token:
-                pickle.dump(credentials, token)
-            
-            logger.info(f"✅ Credentials saved to: {token_path}")
-            
-            # Clear session
-            request.session.pop('google_auth_state', None)
-            request.session.pop('google_auth_user_id', None)
-            
-            logger.info(f"✅ Google Drive connected for user {user.email}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ OAuth callback error: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("❌ Auth URL generation error")
             raise
     
     @staticmethod
     def disconnect(user):
         """Disconnect Google Drive for a user"""
         try:
-            drive_service = GoogleDriveService.__new__(GoogleDriveService)
-            drive_service.user = user
-            token_path = drive_service._get_token_path()
-            
-            if os.path.exists(token_path):
-                os.remove(token_path)
-                logger.info(f"✅ Disconnected Google Drive for user {user.id}")
-                return True
-            else:
+            if not delete_credentials(user.id):
                 logger.warning(f"⚠️ No token found for user {user.id}")
                 return False
+            
+            logger.info(f"✅ Disconnected Google Drive for user {user.id}")
+            return True
                 
         except Exception as e:
             logger.error(f"❌ Error disconnecting Google Drive for user {user.id}: {e}")
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_alter_note_course_subtopic_alter_note_course_topic'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='aihistory',
+            name='ai_history_user_id_af498c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='aihistory',
+            index=models.Index(fields=['user', 'feature_type', '-created_at'], name='ai_history_user_id_e40aaf_idx'),
+        ),
+    ]
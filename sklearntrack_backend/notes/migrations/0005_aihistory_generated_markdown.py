@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_aihistory_housekeeping_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aihistory',
+            name='generated_markdown',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
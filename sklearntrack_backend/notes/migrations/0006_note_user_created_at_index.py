@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_aihistory_generated_markdown'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'created_at'], name='notes_user_id_e2251a_idx'),
+        ),
+    ]
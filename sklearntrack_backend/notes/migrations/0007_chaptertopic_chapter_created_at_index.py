@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chaptertopic',
+            index=models.Index(fields=['chapter', 'created_at'], name='chapter_top_chapter_86c6db_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0007_chaptertopic_chapter_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoogleDriveToken',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='google_drive_token', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('token_json', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'google_drive_tokens',
+            },
+        ),
+    ]
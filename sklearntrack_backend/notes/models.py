@@ -85,6 +85,7 @@ class Note(models.Model):
         ordering = ['-updated_at']
         indexes = [
             models.Index(fields=['user', '-updated_at']),
+            models.Index(fields=['user', 'created_at']),
             models.Index(fields=['user', 'status']),
         ]
         constraints = [
@@ -253,6 +254,9 @@ class ChapterTopic(models.Model):
     class Meta:
         db_table = 'chapter_topics'
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['chapter', 'created_at']),
+        ]
         constraints = [
             # Unique topic name per chapter (case-insensitive)
             models.UniqueConstraint(
@@ -361,6 +365,7 @@ class AIHistory(models.Model):
     title = models.CharField(max_length=500)  # Topic name or prompt
     input_content = models.TextField(blank=True)
     generated_content = models.TextField()
+    generated_markdown = models.TextField(blank=True, default='')  # Source of generated_content
     
     # For code generation
     language = models.CharField(max_length=50, blank=True, default='python')
@@ -377,7 +382,7 @@ class AIHistory(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
-            models.Index(fields=['user', 'feature_type']),
+            models.Index(fields=['user', 'feature_type', '-created_at']),
         ]
     
     def __str__(self):
@@ -388,7 +393,14 @@ class AIHistory(models.Model):
         from django.utils import timezone
         from datetime import timedelta
         self.expires_at = timezone.now() + timedelta(hours=hours)
-        self.save()
+        self.save(update_fields=['expires_at'])
+    
+    @classmethod
+    def create_temporary(cls, hours=24, **fields):
+        """Create a history row with its expiry in a single INSERT"""
+        from django.utils import timezone
+        from datetime import timedelta
+        return cls.objects.create(expires_at=timezone.now() + timedelta(hours=hours), **fields)
 
 
 class NoteShare(models.Model):
@@ -435,4 +447,23 @@ class NoteShare(models.Model):
     def __str__(self):
         if self.is_public:
             return f"Public: {self.note.title}"
-        return f"{self.note.title} -> {self.shared_with.username if self.shared_with else 'Public'}"
\ No newline at end of file
+        return f"{self.note.title} -> {self.shared_with.username if self.shared_with else 'Public'}"
+
+
+class GoogleDriveToken(models.Model):
+    """Google OAuth credentials for a user's Drive connection"""
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='google_drive_token'
+    )
+    token_json = models.TextField()  # Credentials.to_json() (authorized-user format)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'google_drive_tokens'
+    
+    def __str__(self):
+        return f"Drive token for user {self.user_id}"
@@ -3,7 +3,7 @@
 
 from io import BytesIO
 from datetime import date
-from django.core.files.base import ContentFile
+from django.core.files import File
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -21,6 +21,22 @@ from html.parser import HTMLParser
 
 logger = logging.getLogger(__name__)
 
+# Static markup reused for every note/line
+_TITLE_METADATA_TEMPLATE = (
+    '<para alignment="center" fontSize="12">'
+    '<b>Study Notes Document</b><br/><br/>'
+    'Created: {created}<br/>'
+    'Last Updated: {updated}<br/>'
+    'Status: {status}'
+    '</para>'
+)
+_TAGS_TEMPLATE = "<para alignment='center' fontSize='11'><b>Tags:</b> {tags}</para>"
+_PDF_HR = '<br/>' + '-' * 50 + '<br/>'
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)[^>]*>.*?</\1>', re.DOTALL | re.IGNORECASE)
+_MD_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_MD_ITALIC_RE = re.compile(r'\*(.*?)\*')
+_MD_CODE_RE = re.compile(r'`(.*?)`')
+
 
 class HTMLStripper(HTMLParser):
     """Custom HTML parser that preserves formatting tags"""
@@ -90,16 +106,25 @@ class HTMLStripper(HTMLParser):
 class PDFExportService:
     """Service for exporting notes to professional PDFs"""
     
+    _styles = None  # Shared by all exports in the process
+    
     def __init__(self, note):
         self.note = note
         self.styles = self._setup_styles()
-
     
-    def _setup_styles(self):
-        """Setup PDF styles"""
+    @classmethod
+    def _setup_styles(cls):
+        """Get PDF styles, building them on first use"""
+        if cls._styles is None:
+            cls._styles = cls._build_styles()
+        return cls._styles
+    
+    @staticmethod
+    def _build_styles():
+        """Build PDF styles"""
         base_styles = getSampleStyleSheet()
         
-        return {
+        styles = {
             'title': ParagraphStyle(
                 'CustomTitle',
                 parent=base_styles['Heading1'],
@@ -192,6 +217,22 @@ class PDFExportService:
                 fontName='Helvetica'
             ),
         }
+        styles['toc_chapter'] = ParagraphStyle(
+            'TOCChapter',
+            parent=styles['body'],
+            fontSize=12,
+            textColor=colors.HexColor('#2563eb'),
+            fontName='Helvetica-Bold'
+        )
+        styles['toc_topic'] = ParagraphStyle(
+            'TOCTopic',
+            parent=styles['body'],
+            fontSize=10,
+            textColor=colors.black,
+            leftIndent=20,
+            fontName='Helvetica'
+        )
+        return styles
     
     def export(self):
         """Export note to PDF"""
@@ -224,11 +265,10 @@ class PDFExportService:
             # Build PDF
             doc.build(story)
             
-            pdf_content = buffer.getvalue()
-            buffer.close()
-            
+            # Hand back the rendered buffer itself rather than a copy of its bytes
+            buffer.seek(0)
             filename = f"note_{self.note.slug}_{date.today()}.pdf"
-            return ContentFile(pdf_content, name=filename)
+            return File(buffer, name=filename)
             
         except Exception as e:
             logger.error(f"PDF export error for note {self.note.id}: {e}")
@@ -240,18 +280,15 @@ class PDFExportService:
         story.append(Paragraph(self.note.title, self.styles['title']))
         story.append(Spacer(1, 0.6*inch))
         
-        metadata_text = f"""
-        <para alignment="center" fontSize="12">
-        <b>Study Notes Document</b><br/><br/>
-        Created: {self.note.created_at.strftime('%B %d, %Y')}<br/>
-        Last Updated: {self.note.updated_at.strftime('%B %d, %Y')}<br/>
-        Status: {self.note.get_status_display()}
-        </para>
-        """
+        metadata_text = _TITLE_METADATA_TEMPLATE.format(
+            created=self.note.created_at.strftime('%B %d, %Y'),
+            updated=self.note.updated_at.strftime('%B %d, %Y'),
+            status=self.note.get_status_display(),
+        )
         story.append(Paragraph(metadata_text, self.styles['subtitle']))
         
         if self.note.tags:
-            tags_text = f"<para alignment='center' fontSize='11'><b>Tags:</b> {', '.join(self.note.tags)}</para>"
+            tags_text = _TAGS_TEMPLATE.format(tags=', '.join(self.note.tags))
             story.append(Spacer(1, 0.4*inch))
             story.append(Paragraph(tags_text, self.styles['subtitle']))
     
@@ -267,13 +304,7 @@ class PDFExportService:
             toc_data.append([
                 Paragraph(
                     f"<b>Chapter {chapter_num}: {chapter.title}</b>",
-                    ParagraphStyle(
-                        'TOCChapter', 
-                        parent=self.styles['body'],
-                        fontSize=12, 
-                        textColor=colors.HexColor('#2563eb'),
-                        fontName='Helvetica-Bold'
-                    )
+                    self.styles['toc_chapter']
                 ),
                 ""
             ])
@@ -283,14 +314,7 @@ class PDFExportService:
                 toc_data.append([
                     Paragraph(
                         f"&nbsp;&nbsp;&nbsp;&nbsp;{chapter_num}.{topic_num} {topic.name}",
-                        ParagraphStyle(
-                            'TOCTopic', 
-                            parent=self.styles['body'],
-                            fontSize=10, 
-                            textColor=colors.black,
-                            leftIndent=20,
-                            fontName='Helvetica'
-                        )
+                        self.styles['toc_topic']
                     ),
                     ""
                 ])
@@ -411,33 +435,11 @@ def format_text_for_pdf(text):
         return ""
     
     try:
-        # First, preserve basic HTML structure but clean it up
-        # Keep only the tags we want to support
-        allowed_tags = {
-            'h1': '## ',
-            'h2': '### ',
-            'h3': '#### ',
-            'h4': '##### ',
-            'strong': '**',
-            'b': '**',
-            'em': '*',
-            'i': '*',
-            'u': '_',
-            'code': '`',
-            'pre': '```\n',
-            'br': '\n',
-            'p': '\n\n',
-            'li': '* ',
-            'blockquote': '> ',
-            'hr': '\n---\n'
-        }
-        
         # Convert HTML to markdown-like text with proper spacing
         result = text
         
         # Remove script and style tags completely
-        result = re.sub(r'<script[^>]*>.*?</script>', '', result, flags=re.DOTALL | re.IGNORECASE)
-        result = re.sub(r'<style[^>]*>.*?</style>', '', result, flags=re.DOTALL | re.IGNORECASE)
+        result = _SCRIPT_STYLE_RE.sub('', result)
         
         # Convert headings (handle both HTML and markdown)
         result = re.sub(r'<h1[^>]*>(.*?)</h1>', r'\n## \1\n', result, flags=re.IGNORECASE)
@@ -504,16 +506,13 @@ def format_text_for_pdf(text):
                 formatted_lines.append(f'<b>{line[5:]}</b><br/>')
             # Handle bold
             elif '**' in line:
-                line = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', line)
-                formatted_lines.append(f'{line}<br/>')
+                formatted_lines.append(_MD_BOLD_RE.sub(r'<b>\1</b>', line) + '<br/>')
             # Handle italic
             elif '*' in line and not line.startswith('* '):  # Not a list item
-                line = re.sub(r'\*(.*?)\*', r'<i>\1</i>', line)
-                formatted_lines.append(f'{line}<br/>')
+                formatted_lines.append(_MD_ITALIC_RE.sub(r'<i>\1</i>', line) + '<br/>')
             # Handle inline code
             elif '`' in line:
-                line = re.sub(r'`(.*?)`', r'<font face="Courier">\1</font>', line)
-                formatted_lines.append(f'{line}<br/>')
+                formatted_lines.append(_MD_CODE_RE.sub(r'<font face="Courier">\1</font>', line) + '<br/>')
             # Handle code blocks
             elif line.startswith('```'):
                 continue  # Skip the ``` markers
@@ -525,7 +524,7 @@ def format_text_for_pdf(text):
                 formatted_lines.append(f'<i>{line[2:]}</i><br/>')
             # Handle horizontal rule
             elif line.strip() == '---':
-                formatted_lines.append('<br/>' + '-' * 50 + '<br/>')
+                formatted_lines.append(_PDF_HR)
             # Handle empty lines
             elif line.strip() == '':
                 formatted_lines.append('<br/>')
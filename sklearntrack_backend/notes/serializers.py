@@ -7,8 +7,7 @@ from .models import (
     TopicCodeSnippet, TopicSource, NoteVersion, 
     AIGeneratedContent, NoteShare
 )
-import os
-from django.conf import settings
+from .google_drive_service import has_stored_credentials
 
 
 
@@ -179,14 +178,10 @@ class NoteDetailSerializer(serializers.ModelSerializer):
     def get_google_drive_status(self, obj):
         """Check if user has Google Drive connected"""
         user = self.context['request'].user
-        token_path = os.path.join(
-            settings.MEDIA_ROOT,
-            'google_tokens',
-            f'token_{user.id}.pickle'
-        )
+        connected = has_stored_credentials(user.id)
         return {
-            'connected': os.path.exists(token_path),
-            'can_export': os.path.exists(token_path)
+            'connected': connected,
+            'can_export': connected
         }
 
 
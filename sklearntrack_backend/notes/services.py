@@ -6,6 +6,7 @@
 from django.db import models
 from django.db import transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from .models import (
     Note, Chapter, ChapterTopic, TopicExplanation,
     TopicCodeSnippet, TopicSource, NoteVersion
@@ -176,10 +177,15 @@ class ChapterService:
     
     @staticmethod
     def update_chapter(chapter, **data):
-        """Update chapter"""
+        """Update chapter (single UPDATE of the changed columns; no signals)"""
+        if not data:
+            return chapter
+        
+        data['updated_at'] = timezone.now()  # update() skips auto_now
+        Chapter.objects.filter(pk=chapter.pk).update(**data)
+        
         for key, value in data.items():
             setattr(chapter, key, value)
-        chapter.save()
         return chapter
     
     @staticmethod
@@ -3,6 +3,7 @@
 
 from celery import shared_task
 from django.utils import timezone
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from datetime import timedelta, datetime
 import logging
@@ -11,6 +12,9 @@ from django.db import models  # ADD THIS IMPORT
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Users per send_daily_reports_task; stays under SendGrid's 1000 personalizations per call
+DAILY_REPORT_BATCH_SIZE = 500
+
 
 @shared_task
 def auto_sync_updated_notes():
@@ -74,11 +78,14 @@ def daily_backup_all_notes():
     from .google_drive_service import GoogleDriveService  # FIXED IMPORT
     from .pdf_service import export_note_to_pdf  # FIXED IMPORT
     
-    today = timezone.now().date()
+    today = timezone.localdate()
+    day_start = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    day_end = day_start + timedelta(days=1)
     
-    # Get all notes created or updated today
+    # Get all notes created or updated today (range bounds keep the timestamp indexes usable)
     notes_today = Note.objects.filter(
-        models.Q(created_at__date=today) | models.Q(updated_at__date=today),
+        models.Q(created_at__gte=day_start, created_at__lt=day_end)
+        | models.Q(updated_at__gte=day_start, updated_at__lt=day_end),
         status='published'
     ).select_related('user').distinct()
     
@@ -132,4 +139,68 @@ def cleanup_old_versions():
             old_versions.delete()
             deleted_count += count
     
-    return f"Deleted {deleted_count} old versions"
\ No newline at end of file
+    return f"Deleted {deleted_count} old versions"
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def send_daily_report_task(self, user_id, report_date=None):
+    """Build and email the learning report for one user"""
+    from .daily_report_service import DailyNotesReportService
+    
+    # Only the id travels through the broker; the report is rebuilt on the worker
+    try:
+        user = User.objects.only('email', 'username', 'first_name').get(pk=user_id)
+    except User.DoesNotExist:
+        logger.warning(f"⚠️ Daily report skipped, user {user_id} no longer exists")
+        return f"User {user_id} not found"
+    
+    # ISO date from the enqueuer, so retries after midnight still report the same day
+    today = datetime.strptime(report_date, '%Y-%m-%d').date() if report_date else None
+    report_data = DailyNotesReportService.generate_daily_report(user, today)
+    if not DailyNotesReportService.has_activity(report_data):
+        return f"Daily report skipped for user {user_id}, no activity"
+    # Send on the worker thread so a failure reaches autoretry instead of a background pool
+    if not DailyNotesReportService.send_daily_report_email(user, report_data, async_send=False):
+        raise RuntimeError(f"Daily report email failed for user {user_id}")
+    
+    return f"Daily report sent to user {user_id}"
+
+
+@shared_task
+def send_daily_reports_task(user_ids, report_date=None):
+    """Build and email the learning reports for a batch of users"""
+    from .daily_report_service import DailyNotesReportService
+    
+    # No autoretry: a retried batch would re-send the reports that already went out
+    users = User.objects.filter(pk__in=user_ids).only('email', 'username', 'first_name')
+    today = datetime.strptime(report_date, '%Y-%m-%d').date() if report_date else None
+    sent_count = DailyNotesReportService.send_daily_reports(users, today)
+    
+    return f"Sent {sent_count} of {len(user_ids)} daily reports"
+
+
+@shared_task
+def queue_daily_report_emails():
+    """
+    Enqueue daily report batches for users active today
+    Runs nightly; each batch shares one SMTP connection or SendGrid call
+    """
+    today = timezone.localdate()
+    day_start = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    day_end = day_start + timedelta(days=1)
+    
+    recipients = User.objects.exclude(email='')
+    if getattr(settings, 'DAILY_REPORT_MIN_ACTIVITY', 1) > 0:
+        # Creating a note also stamps updated_at, so these two cover all report activity
+        recipients = recipients.filter(
+            models.Q(notes__updated_at__gte=day_start, notes__updated_at__lt=day_end)
+            | models.Q(notes__chapters__topics__created_at__gte=day_start,
+                       notes__chapters__topics__created_at__lt=day_end)
+        ).distinct()
+    user_ids = list(recipients.order_by('pk').values_list('pk', flat=True))
+    
+    report_date = today.isoformat()
+    for start in range(0, len(user_ids), DAILY_REPORT_BATCH_SIZE):
+        send_daily_reports_task.delay(user_ids[start:start + DAILY_REPORT_BATCH_SIZE], report_date)
+    
+    return f"Queued {len(user_ids)} daily reports"
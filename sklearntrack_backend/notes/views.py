@@ -2,6 +2,8 @@
 # ============================================================================
 
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from django.core.exceptions import ValidationError
 
 from rest_framework import viewsets, permissions, status
@@ -10,7 +12,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.db import transaction, connection
 from django.db.models import Q, Count, Prefetch, Max
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from uuid import uuid4
 from .models import AIHistory
@@ -38,7 +40,9 @@ from .serializers import (
     TopicUpdateSerializer
 )
 from .ai_service import (
+    get_ai_service,
     generate_ai_explanation,
+    stream_ai_explanation,
     generate_ai_code,
     improve_explanation,
     summarize_explanation
@@ -48,6 +52,17 @@ from .pdf_service import export_note_to_pdf
 logger = logging.getLogger(__name__)
 
 
+def _collect_chunks(generator, chunks):
+    """Re-yield streamed chunks, keeping a copy; returns the generator's result"""
+    while True:
+        try:
+            chunk = next(generator)
+        except StopIteration as done:
+            return done.value
+        chunks.append(chunk)
+        yield chunk
+
+
 class NoteViewSet(viewsets.ModelViewSet):
     """Note CRUD with chapters and topics"""
 
@@ -204,14 +219,26 @@ class NoteViewSet(viewsets.ModelViewSet):
         note = self.get_object()
         
         try:
+            # Token load/refresh uses the ORM, so it stays on the request thread
+            # (and fails fast before rendering the PDF for unconnected users)
             drive_service = GoogleDriveService(request.user)
-            pdf_file = export_note_to_pdf(note)
+            
+            if note.drive_file_id:
+                folder_id = None
+                pdf_file = export_note_to_pdf(note)
+            else:
+                # The folder lookup is pure network; overlap it with building the PDF
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    folder_future = executor.submit(drive_service.get_or_create_folder)
+                    pdf_file = export_note_to_pdf(note)
+                    folder_id = folder_future.result()
             
             filename = f"{note.title}_{timezone.now().date()}.pdf"
             result = drive_service.upload_or_update_pdf(
                 pdf_file,
                 filename,
-                existing_file_id=note.drive_file_id
+                existing_file_id=note.drive_file_id,
+                folder_id=folder_id
             )
             
             if result['success']:
@@ -285,7 +312,7 @@ class NoteViewSet(viewsets.ModelViewSet):
                             'id': note.id,
                             'title': note.title,
                             'status': note.status,
-                            'chapters_count': note.chapters.count()
+                            'chapters_count': note.chapter_count
                         }
                         for note in report_data['notes_list']
                     ]
@@ -816,26 +843,27 @@ class NoteShareViewSet(viewsets.ModelViewSet):
 # CODE EXECUTION API
 # ============================================================================
 
-def extract_input_requirements(code, language):
-    """Check if code requires input"""
-    if not code:
-        return False
-    
-    patterns = {
+# Input-reading calls per language, one compiled alternation each
+INPUT_PATTERNS = {
+    language: re.compile('|'.join(patterns), re.IGNORECASE)
+    for language, patterns in {
         'python': [r'input\s*\(', r'raw_input\s*\('],
         'java': [r'Scanner\s*\.\s*', r'System\.in', r'BufferedReader'],
         'c': [r'scanf\s*\(', r'gets\s*\(', r'fgets\s*\('],
         'cpp': [r'cin\s*>>', r'getline\s*\(', r'std::cin'],
         'javascript': [r'prompt\s*\(', r'readline\s*\(', r'console\.read'],
         'go': [r'fmt\.Scan', r'bufio\.NewReader'],
-    }
+    }.items()
+}
+
+
+def extract_input_requirements(code, language):
+    """Check if code requires input"""
+    if not code:
+        return False
     
-    if language in patterns:
-        import re
-        for pattern in patterns[language]:
-            if re.search(pattern, code, re.IGNORECASE):
-                return True
-    return False
+    pattern = INPUT_PATTERNS.get(language)
+    return bool(pattern and pattern.search(code))
 
 
 @api_view(['POST'])
@@ -906,6 +934,34 @@ def execute_code(request):
         }, status=500)
 
 
+_PYTHON_TIPS = (
+    "• Check for syntax errors (missing colons, parentheses, etc.)",
+    "• Verify all variables are defined before use",
+    "• Ensure proper indentation (Python is strict about this!)",
+    "• Check for infinite loops or recursion",
+)
+_JS_TIPS = (
+    "• Check for missing semicolons or braces",
+    "• Verify variable declarations (let/const/var)",
+    "• Check for undefined variables or functions",
+)
+_COMPILED_TIPS = (
+    "• Check for missing semicolons or braces",
+    "• Verify all required imports/includes",
+    "• Check for type mismatches",
+)
+
+# Debugging tips per language, looked up once instead of walking an if/elif chain
+DEBUGGING_TIPS = {
+    'python': _PYTHON_TIPS,
+    'javascript': _JS_TIPS,
+    'typescript': _JS_TIPS,
+    'java': _COMPILED_TIPS,
+    'cpp': _COMPILED_TIPS,
+    'c': _COMPILED_TIPS,
+}
+
+
 def format_error_output(error_output, language, original_code):
     """Format error output to look like VS Code with line numbers"""
     if not error_output:
@@ -955,19 +1011,7 @@ def format_error_output(error_output, language, original_code):
     formatted_error.append("\n" + "=" * 80)
     formatted_error.append("\n💡 DEBUGGING TIPS:")
     
-    if language == 'python':
-        formatted_error.append("• Check for syntax errors (missing colons, parentheses, etc.)")
-        formatted_error.append("• Verify all variables are defined before use")
-        formatted_error.append("• Ensure proper indentation (Python is strict about this!)")
-        formatted_error.append("• Check for infinite loops or recursion")
-    elif language in ['javascript', 'typescript']:
-        formatted_error.append("• Check for missing semicolons or braces")
-        formatted_error.append("• Verify variable declarations (let/const/var)")
-        formatted_error.append("• Check for undefined variables or functions")
-    elif language in ['java', 'cpp', 'c']:
-        formatted_error.append("• Check for missing semicolons or braces")
-        formatted_error.append("• Verify all required imports/includes")
-        formatted_error.append("• Check for type mismatches")
+    formatted_error.extend(DEBUGGING_TIPS.get(language, ()))
     
     return '\n'.join(formatted_error)
 
@@ -975,6 +1019,19 @@ class AIToolsViewSet(viewsets.ViewSet):
     """Standalone AI Tools with user isolation"""
     permission_classes = [permissions.IsAuthenticated]
     
+    def _history_markdown(self, request):
+        """Stored markdown for an optional history_id owned by the user"""
+        try:
+            history_id = int(request.data.get('history_id') or 0)
+        except (TypeError, ValueError):
+            # Malformed ids are treated like a missing one rather than a 500
+            return ''
+        if not history_id:
+            return ''
+        return AIHistory.objects.filter(
+            id=history_id, user=request.user
+        ).values_list('generated_markdown', flat=True).first() or ''
+    
     @action(detail=False, methods=['post'])
     def explain_topic(self, request):
         title = request.data.get('title', '').strip()
@@ -987,18 +1044,18 @@ class AIToolsViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            generated_content = generate_ai_explanation(title)
+            generated_content, generated_markdown = get_ai_service().generate_explanation_with_markdown(title)
             
             history_item = None
             if save_to_history:
-                history_item = AIHistory.objects.create(
+                history_item = AIHistory.create_temporary(
                     user=request.user,
                     feature_type='explain_topic',
                     title=title,
                     input_content=title,
-                    generated_content=generated_content
+                    generated_content=generated_content,
+                    generated_markdown=generated_markdown
                 )
-                history_item.set_expiry(hours=24)
             
             return Response({
                 'success': True,
@@ -1015,31 +1072,74 @@ class AIToolsViewSet(viewsets.ViewSet):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['post'])
+    def explain_topic_stream(self, request):
+        """Stream explanation markdown as it is generated"""
+        title = request.data.get('title', '').strip()
+        save_to_history = request.data.get('save_to_history', True)
+        
+        if not title:
+            return Response({
+                'success': False,
+                'error': 'Title is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = request.user
+        
+        def stream():
+            chunks = []
+            succeeded = yield from _collect_chunks(stream_ai_explanation(title), chunks)
+            
+            # Configuration/error notices are streamed to the client but never saved
+            if save_to_history and succeeded:
+                try:
+                    generated_markdown = ''.join(chunks)
+                    AIHistory.create_temporary(
+                        user=user,
+                        feature_type='explain_topic',
+                        title=title,
+                        input_content=title,
+                        generated_content=get_ai_service()._markdown_to_html(generated_markdown),
+                        generated_markdown=generated_markdown
+                    )
+                except Exception as e:
+                    logger.error(f"AI Explain Topic stream history error: {e}")
+        
+        response = StreamingHttpResponse(stream(), content_type='text/markdown; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
     @action(detail=False, methods=['post'])
     def improve(self, request):
         title = request.data.get('title', '').strip()
         input_content = request.data.get('input_content', '').strip()
         save_to_history = request.data.get('save_to_history', True)
+        source_markdown = self._history_markdown(request)
         
-        if not input_content:
+        if not input_content and not source_markdown:
             return Response({
                 'success': False,
                 'error': 'Input content is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            generated_content = improve_explanation(input_content)
+            if source_markdown:
+                # Reuse the stored markdown instead of stripping rendered HTML
+                generated_content = improve_explanation(source_markdown, is_markdown=True)
+                input_content = input_content or source_markdown
+            else:
+                generated_content = improve_explanation(input_content)
             
             history_item = None
             if save_to_history:
-                history_item = AIHistory.objects.create(
+                history_item = AIHistory.create_temporary(
                     user=request.user,
                     feature_type='improve',
                     title=title or 'Improved Content',
                     input_content=input_content,
                     generated_content=generated_content
                 )
-                history_item.set_expiry(hours=24)
             
             return Response({
                 'success': True,
@@ -1061,26 +1161,31 @@ class AIToolsViewSet(viewsets.ViewSet):
         title = request.data.get('title', '').strip()
         input_content = request.data.get('input_content', '').strip()
         save_to_history = request.data.get('save_to_history', True)
+        source_markdown = self._history_markdown(request)
         
-        if not input_content:
+        if not input_content and not source_markdown:
             return Response({
                 'success': False,
                 'error': 'Input content is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            generated_content = summarize_explanation(input_content)
+            if source_markdown:
+                # Reuse the stored markdown instead of stripping rendered HTML
+                generated_content = summarize_explanation(source_markdown, is_markdown=True)
+                input_content = input_content or source_markdown
+            else:
+                generated_content = summarize_explanation(input_content)
             
             history_item = None
             if save_to_history:
-                history_item = AIHistory.objects.create(
+                history_item = AIHistory.create_temporary(
                     user=request.user,
                     feature_type='summarize',
                     title=title or 'Summary',
                     input_content=input_content,
                     generated_content=generated_content
                 )
-                history_item.set_expiry(hours=24)
             
             return Response({
                 'success': True,
@@ -1114,7 +1219,7 @@ class AIToolsViewSet(viewsets.ViewSet):
             
             history_item = None
             if save_to_history:
-                history_item = AIHistory.objects.create(
+                history_item = AIHistory.create_temporary(
                     user=request.user,
                     feature_type='generate_code',
                     title=title,
@@ -1122,7 +1227,6 @@ class AIToolsViewSet(viewsets.ViewSet):
                     generated_content=generated_content,
                     language=language
                 )
-                history_item.set_expiry(hours=24)
             
             return Response({
                 'success': True,
@@ -1150,7 +1254,11 @@ class AIToolsViewSet(viewsets.ViewSet):
         if feature_type:
             queryset = queryset.filter(feature_type=feature_type)
         
-        queryset = queryset.order_by('-created_at')[:50]
+        # Load only the serialized columns (skips the stored markdown source)
+        queryset = queryset.only(
+            'id', 'feature_type', 'title', 'input_content', 'generated_content',
+            'language', 'created_at', 'expires_at', 'drive_file_id'
+        ).order_by('-created_at')[:50]
         
         serializer = AIHistorySerializer(queryset, many=True)
         return Response(serializer.data)
@@ -1158,12 +1266,10 @@ class AIToolsViewSet(viewsets.ViewSet):
     @action(detail=True, methods=['delete'])
     def delete_history(self, request, pk=None):
         """Delete history - verify ownership"""
-        try:
-            history_item = AIHistory.objects.get(id=pk, user=request.user)
-            history_item.delete()
+        deleted, _ = AIHistory.objects.filter(id=pk, user=request.user).delete()
+        if deleted:
             return Response({'success': True, 'message': 'History item deleted'})
-        except AIHistory.DoesNotExist:
-            return Response({
-                'success': False,
-                'error': 'History item not found or access denied'
-            }, status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        return Response({
+            'success': False,
+            'error': 'History item not found or access denied'
+        }, status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
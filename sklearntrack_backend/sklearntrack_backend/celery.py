@@ -35,6 +35,11 @@ app.conf.beat_schedule = {
         'task': 'notes.tasks.cleanup_old_versions',
         'schedule': crontab(hour=2, minute=0, day_of_week=0),  # Sunday 2 AM
     },
+    # Nightly daily reports for users active today
+    'queue-daily-report-emails': {
+        'task': 'notes.tasks.queue_daily_report_emails',
+        'schedule': crontab(hour=22, minute=0),
+    },
 }
 
 app.conf.timezone = 'UTC'
\ No newline at end of file
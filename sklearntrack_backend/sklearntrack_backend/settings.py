@@ -235,6 +235,12 @@ FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000' if DEBUG e
 # Get SendGrid API Key (Production - Preferred Method)
 SENDGRID_API_KEY = config('SENDGRID_API_KEY', default='').strip()
 
+# Optional SendGrid dynamic template for daily reports (enables batched sends)
+SENDGRID_DAILY_REPORT_TEMPLATE_ID = config('SENDGRID_DAILY_REPORT_TEMPLATE_ID', default='').strip()
+
+# Batch daily reports skip users with less activity than this (notes created/updated + topics added)
+DAILY_REPORT_MIN_ACTIVITY = config('DAILY_REPORT_MIN_ACTIVITY', default=1, cast=int)
+
 # SMTP Configuration (Fallback or Development)
 EMAIL_HOST = config('EMAIL_HOST', default='')
 EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
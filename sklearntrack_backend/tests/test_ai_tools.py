@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch
+from notes.models import AIHistory
+
+
+def _stream(chunks, succeeded):
+    yield from chunks
+    return succeeded
+
+
+@pytest.mark.django_db
+def test_explain_topic_stream_saves_history(auth_client, user):
+    with patch('notes.views.stream_ai_explanation', return_value=_stream(['## Loops', '\n\nRepeat code.'], True)):
+        response = auth_client.post('/api/ai-tools/explain_topic_stream/', {'title': 'Loops'}, format='json')
+        body = b''.join(response.streaming_content).decode()
+
+    assert response.status_code == 200
+    assert body == '## Loops\n\nRepeat code.'
+    history = AIHistory.objects.get(user=user)
+    assert history.feature_type == 'explain_topic'
+    assert history.expires_at is not None
+
+
+@pytest.mark.django_db
+def test_explain_topic_stream_does_not_save_failed_generation(auth_client, user):
+    failed = _stream(['\n\n**❌ AI Error:** rate limited'], False)
+    with patch('notes.views.stream_ai_explanation', return_value=failed):
+        response = auth_client.post('/api/ai-tools/explain_topic_stream/', {'title': 'Loops'}, format='json')
+        body = b''.join(response.streaming_content).decode()
+
+    assert 'AI Error' in body
+    assert not AIHistory.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+def test_history_lists_only_own_items(auth_client, user, admin_user):
+    AIHistory.objects.create(user=user, feature_type='summarize', title='Mine', generated_content='x')
+    AIHistory.objects.create(user=admin_user, feature_type='summarize', title='Other', generated_content='y')
+
+    response = auth_client.get('/api/ai-tools/history/', {'feature_type': 'summarize'})
+
+    assert response.status_code == 200
+    assert [item['title'] for item in response.data] == ['Mine']
+
+
+@pytest.mark.django_db
+def test_summarize_from_history_uses_stored_markdown(auth_client, user):
+    source = AIHistory.create_temporary(
+        user=user, feature_type='explain_topic', title='Loops',
+        generated_content='<h2>Loops</h2>', generated_markdown='## Loops\n\nRepeat code.'
+    )
+
+    with patch('notes.views.summarize_explanation', return_value='<p>Short</p>') as summarize:
+        response = auth_client.post('/api/ai-tools/summarize/', {'history_id': source.id}, format='json')
+
+    assert response.status_code == 200
+    summarize.assert_called_once_with('## Loops\n\nRepeat code.', is_markdown=True)
+
+
+@pytest.mark.django_db
+def test_summarize_with_malformed_history_id_is_a_bad_request(auth_client):
+    response = auth_client.post('/api/ai-tools/summarize/', {'history_id': 'abc'}, format='json')
+
+    assert response.status_code == 400
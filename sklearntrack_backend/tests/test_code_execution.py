@@ -0,0 +1,63 @@
+from unittest.mock import patch, MagicMock
+from django.core.cache import cache
+from notes.code_execution_service import CodeExecutionService
+
+
+def _piston_response(payload):
+    response = MagicMock(status_code=200)
+    response.json.return_value = payload
+    return response
+
+
+def test_python_input_without_stdin_skips_executor():
+    with patch('notes.code_execution_service._session') as session:
+        result = CodeExecutionService.execute_code('name = input()\nprint(name)', 'python')
+
+    assert result['requires_input'] is True
+    session.post.assert_not_called()
+
+
+def test_compile_errors_are_cached_by_source():
+    cache.clear()
+    code = 'int main() { return 0 }'
+    failed = _piston_response({
+        'compile': {'code': 1, 'stdout': '', 'stderr': "error: expected ';'", 'signal': None},
+        'run': None,
+    })
+
+    with patch('notes.code_execution_service._session') as session:
+        session.post.return_value = failed
+        first = CodeExecutionService.execute_code(code, 'c')
+        second = CodeExecutionService.execute_code(code, 'c')
+
+    assert session.post.call_count == 1
+    assert first['error'] == second['error'] == "error: expected ';'"
+    assert second['success'] is False
+
+
+def test_execute_batch_keeps_job_order():
+    def fake_post(url, json, **kwargs):
+        return _piston_response({'run': {'code': 0, 'stdout': json['stdin'], 'stderr': ''}})
+
+    with patch('notes.code_execution_service._session') as session:
+        session.post.side_effect = fake_post
+        results = CodeExecutionService.execute_batch([
+            {'code': 'print(1)', 'language': 'python', 'stdin': 'a'},
+            {'code': 'print(2)', 'language': 'python', 'stdin': 'b'},
+            {'code': 'print(3)', 'language': 'python', 'stdin': 'c'},
+        ])
+
+    assert [r['output'] for r in results] == ['a', 'b', 'c']
+
+
+def test_memory_limit_is_not_sent_for_vm_runtimes():
+    ok = _piston_response({'run': {'code': 0, 'stdout': '', 'stderr': ''}})
+
+    with patch('notes.code_execution_service._session') as session:
+        session.post.return_value = ok
+        CodeExecutionService.execute_code('print(1)', 'python', memory_limit=64)
+        CodeExecutionService.execute_code('console.log(1)', 'javascript')
+
+    python_payload, js_payload = (call.kwargs['json'] for call in session.post.call_args_list)
+    assert python_payload['run_memory_limit'] == 64 * 1024 * 1024
+    assert 'run_memory_limit' not in js_payload
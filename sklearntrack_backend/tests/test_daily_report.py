@@ -0,0 +1,144 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.core import mail
+from django.utils import timezone
+from notes.models import Note, Chapter, ChapterTopic
+from notes.daily_report_service import DailyNotesReportService
+from notes.email_service import EmailService
+from notes.tasks import queue_daily_report_emails, send_daily_report_task, send_daily_reports_task
+
+
+@pytest.mark.django_db
+def test_generate_daily_report_counts(user, admin_user):
+    yesterday = timezone.now() - timedelta(days=1)
+
+    created = Note.objects.create(user=user, title='New today')
+    chapter = Chapter.objects.create(note=created, title='Basics', order=0)
+    ChapterTopic.objects.create(chapter=chapter, name='Variables', order=0)
+    ChapterTopic.objects.create(chapter=chapter, name='Loops', order=1)
+
+    old_but_edited = Note.objects.create(user=user, title='Edited today')
+    Note.objects.filter(pk=old_but_edited.pk).update(created_at=yesterday)
+
+    untouched = Note.objects.create(user=user, title='Untouched')
+    Note.objects.filter(pk=untouched.pk).update(created_at=yesterday, updated_at=yesterday)
+
+    Note.objects.create(user=admin_user, title='Someone else')
+
+    report = DailyNotesReportService.generate_daily_report(user)
+
+    assert report['notes_created'] == 1
+    assert report['notes_updated'] == 1
+    assert report['topics_created'] == 2
+    assert report['study_time_estimate'] == 10
+    assert {note.title: note.chapter_count for note in report['notes_list']} == {'New today': 1, 'Edited today': 0}
+
+
+@pytest.mark.django_db
+def test_daily_report_email_lists_chapter_counts(user, django_assert_num_queries):
+    note = Note.objects.create(user=user, title='Python')
+    Chapter.objects.create(note=note, title='Basics', order=0)
+    Chapter.objects.create(note=note, title='Functions', order=1)
+    report = DailyNotesReportService.generate_daily_report(user)
+
+    with django_assert_num_queries(1):
+        _, text = DailyNotesReportService._create_email_content(user, report)
+
+    assert '- Python (2 chapters, draft)' in text
+
+
+@pytest.mark.django_db
+def test_send_daily_reports_shares_one_connection(user, admin_user, settings):
+    settings.SENDGRID_API_KEY = ''
+    settings.EMAIL_HOST = 'smtp.example.com'
+    Note.objects.create(user=user, title='Mine')
+    Note.objects.create(user=admin_user, title='Theirs')
+
+    with patch('notes.email_service.get_connection') as get_connection:
+        get_connection.return_value = mail.get_connection('django.core.mail.backends.locmem.EmailBackend')
+        with patch('django.core.mail.get_connection', get_connection):
+            sent = DailyNotesReportService.send_daily_reports([user, admin_user])
+
+    assert sent == 2
+    assert get_connection.call_count == 1
+    assert sorted(m.to[0] for m in mail.outbox) == ['admin@example.com', 'test@example.com']
+
+
+@pytest.mark.django_db
+def test_send_daily_report_task_sends_for_user(user, settings):
+    settings.DEBUG = False
+    settings.SENDGRID_DAILY_REPORT_TEMPLATE_ID = ''
+    Note.objects.create(user=user, title='Mine')
+
+    with patch('notes.email_service.EmailService._send_email_sync', return_value=True) as send:
+        result = send_daily_report_task.apply(args=[user.id]).get()
+
+    assert result == f"Daily report sent to user {user.id}"
+    assert send.call_count == 1
+    assert send.call_args.args[0] == user.email
+
+
+@pytest.mark.django_db
+def test_send_daily_report_task_retries_failed_send(user, settings):
+    settings.DEBUG = False
+    settings.SENDGRID_DAILY_REPORT_TEMPLATE_ID = ''
+    Note.objects.create(user=user, title='Mine')
+
+    with patch('notes.email_service.EmailService._send_email_sync', return_value=False) as send:
+        result = send_daily_report_task.apply(args=[user.id])
+
+    assert result.failed()
+    assert send.call_count == send_daily_report_task.max_retries + 1
+
+
+@pytest.mark.django_db
+def test_send_daily_reports_batches_active_users_via_template(user, admin_user, settings):
+    settings.DEBUG = False
+    settings.SENDGRID_DAILY_REPORT_TEMPLATE_ID = 'd-report'
+    Note.objects.create(user=user, title='Mine')
+
+    with patch('notes.email_service.EmailService.send_template_batch', return_value=1) as batch:
+        sent = DailyNotesReportService.send_daily_reports([user, admin_user])
+
+    assert sent == 1
+    template_id, recipients = batch.call_args.args
+    assert template_id == 'd-report'
+    assert [r['to_email'] for r in recipients] == [user.email]
+    assert recipients[0]['data']['notes_list'] == [{'title': 'Mine', 'status': 'draft', 'chapter_count': 0}]
+
+
+def test_single_smtp_sends_close_their_connection(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST = 'smtp.example.com'
+    settings.EMAIL_USE_TLS = False
+
+    with patch('django.core.mail.backends.smtp.smtplib.SMTP') as smtp:
+        for address in ('a@example.com', 'b@example.com'):
+            assert EmailService._send_via_smtp(address, 'Hi', 'Body', None, 'noreply@example.com')
+
+    assert smtp.call_count == 2
+    assert smtp.return_value.quit.call_count == 2
+
+
+@pytest.mark.django_db
+def test_queue_daily_report_emails_batches_active_users(user, admin_user):
+    Note.objects.create(user=user, title='Mine')
+
+    with patch.object(send_daily_reports_task, 'delay') as delay:
+        result = queue_daily_report_emails()
+
+    assert result == "Queued 1 daily reports"
+    delay.assert_called_once_with([user.id], timezone.localdate().isoformat())
+
+
+@pytest.mark.django_db
+def test_send_daily_report_task_respects_activity_threshold(user, settings):
+    settings.DAILY_REPORT_MIN_ACTIVITY = 2
+    Note.objects.create(user=user, title='Mine')
+
+    with patch.object(DailyNotesReportService, 'send_daily_report_email') as send:
+        result = send_daily_report_task.apply(args=[user.id]).get()
+
+    assert result == f"Daily report skipped for user {user.id}, no activity"
+    send.assert_not_called()
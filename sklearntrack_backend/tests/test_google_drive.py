@@ -0,0 +1,130 @@
+import json
+import pickle
+import pytest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from google.oauth2.credentials import Credentials
+from notes.google_drive_service import (
+    load_credentials, save_credentials, has_stored_credentials, delete_credentials,
+    _drive_service,
+)
+from notes import google_callback
+from notes.models import GoogleDriveToken, Note
+
+
+def _credentials(token='access'):
+    return Credentials(
+        token=token, refresh_token='refresh', token_uri='https://oauth2.googleapis.com/token',
+        client_id='id.apps.googleusercontent.com', client_secret='secret',
+        scopes=['https://www.googleapis.com/auth/drive.file'],
+        expiry=datetime.utcnow() + timedelta(hours=1),
+    )
+
+
+@pytest.mark.django_db
+def test_credentials_round_trip_through_database(settings, tmp_path, user):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    save_credentials(user.id, _credentials())
+    creds = load_credentials(user.id)
+
+    assert json.loads(GoogleDriveToken.objects.get(user=user).token_json)['token'] == 'access'
+    assert (creds.token, creds.refresh_token, creds.valid) == ('access', 'refresh', True)
+    assert delete_credentials(user.id) and not has_stored_credentials(user.id)
+
+
+@pytest.mark.django_db
+def test_legacy_token_files_are_moved_into_database(settings, tmp_path, user):
+    settings.MEDIA_ROOT = str(tmp_path)
+    token_dir = tmp_path / 'google_tokens'
+    token_dir.mkdir()
+    legacy = token_dir / f'token_{user.id}.pickle'
+    legacy.write_bytes(pickle.dumps(_credentials()))
+
+    assert has_stored_credentials(user.id)
+    assert load_credentials(user.id).token == 'access'
+    assert not legacy.exists()
+    assert GoogleDriveToken.objects.filter(user=user).exists()
+
+    json_token = token_dir / f'token_{user.id}.json'
+    json_token.write_text(_credentials('from-json').to_json())
+
+    assert load_credentials(user.id).token == 'access'
+    assert delete_credentials(user.id) and not json_token.exists()
+
+
+@pytest.mark.django_db
+def test_load_credentials_is_cached_until_token_changes(user):
+    save_credentials(user.id, _credentials())
+    first = load_credentials(user.id)
+
+    assert load_credentials(user.id) is first
+
+    save_credentials(user.id, _credentials('refreshed'))
+
+    assert load_credentials(user.id).token == 'refreshed'
+
+
+def test_callback_error_page_escapes_message(client):
+    response = client.get('/api/notes/google-callback/', {'error': '<script>x</script>'})
+
+    assert response.status_code == 400
+    assert b'Token Exchange Failed' in response.content
+    assert b'&lt;script&gt;x&lt;/script&gt;' in response.content
+
+
+def test_callback_rejects_malformed_state_without_session(client):
+    response = client.get('/api/notes/google-callback/', {'state': 'x' * 600, 'code': 'abc'})
+
+    assert response.status_code == 400
+    assert b'Invalid state parameter' in response.content
+
+
+def test_drive_client_is_reused_per_credentials_and_thread():
+    creds = _credentials()
+    client = _drive_service(creds)
+
+    assert _drive_service(creds) is client
+    assert _drive_service(_credentials()) is not client
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(_drive_service, creds).result() is not client
+
+
+@pytest.mark.django_db
+def test_export_to_drive_requires_auth_before_rendering_pdf(auth_client, user):
+    note = Note.objects.create(user=user, title='Python')
+
+    with patch('notes.views.export_note_to_pdf') as render:
+        response = auth_client.post(f'/api/notes/{note.id}/export_to_drive/')
+
+    assert response.status_code == 401
+    assert response.data['needs_auth'] is True
+    render.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_callback_gives_up_when_another_exchange_holds_the_lock(client, user, settings):
+    settings.GOOGLE_OAUTH_CLIENT_ID = 'id.apps.googleusercontent.com'
+    settings.GOOGLE_OAUTH_CLIENT_SECRET = 'secret'
+    held = google_callback._user_lock(user.id)
+    held.acquire()
+    try:
+        with patch.object(google_callback, 'USER_LOCK_TIMEOUT', 0.01):
+            response = client.get('/api/notes/google-callback/', {'state': f'{user.id}:abc', 'code': 'code'})
+    finally:
+        held.release()
+
+    assert response.status_code == 400
+    assert b'still in progress' in response.content
+
+
+def test_exchange_bookkeeping_is_bounded():
+    google_callback._user_lock(999_999)
+    assert 999_999 not in google_callback._user_locks
+
+    with patch.object(google_callback, 'EXCHANGED_CODES_MAX', 2):
+        for user_id in (1, 2, 3):
+            google_callback._remember_exchanged_code(user_id, f'code-{user_id}')
+    assert list(google_callback._exchanged_codes)[-2:] == [2, 3]
+    assert 1 not in google_callback._exchanged_codes